@@ -0,0 +1,373 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import lock_stats
+
+# ========================
+# Concurrent load generator for the booking engines
+# ========================
+#
+# Example:
+#   python benchmark.py --engine final --workers 16 --ops 200 --read-ratio 0.8 --skew 1.1
+#
+# Every run works in a fresh temporary directory, so it never touches the
+# project's own JSON files, and appends one JSON line with its configuration
+# and results to --output so runs can be compared across engine changes.
+
+ENGINES = ("final", "hany", "crud", "daemon")
+
+# In processes mode the final engine's workers share one seat map file
+# (see final_project.SHARED_SEATS_ENV), as processes launched by runner.py do
+SHARED_SEATS_ENV = "SEAT_ENGINE_FILE"
+SHARED_SEATS_FILE = "seats.shm"
+
+# hany and crud keep their state in memory per process and rewrite the
+# whole file on save, so separate processes would overwrite each other
+PROCESS_ENGINES = ("final", "daemon")
+
+# ========================
+# Engine adapters: setup(), read(), book(user, seat) -> bool,
+# cancel(user, seat) -> bool, teardown()
+# ========================
+
+class FinalProjectEngine:
+    """final_project.book_seat / cancel_seat on the in-memory seat store."""
+
+    def __init__(self, seat_count, confirm_delay):
+        self.seat_count = seat_count
+        self.confirm_delay = confirm_delay
+
+    def setup(self):
+        if not os.path.exists("seats.json"):
+            with open("seats.json", "w") as file:
+                json.dump(["Available" for _ in range(self.seat_count)], file)
+        import final_project
+        final_project.CONFIRM_DELAY = self.confirm_delay
+        final_project.initialize_seat_store()
+        final_project.initialize_history_log()
+        final_project.initialize_hold_manager()
+        self.project = final_project
+
+    def read(self):
+        self.project.load_seat_data()
+
+    def book(self, user, seat):
+        return self.project.book_seat(user, seat) == "Booking successful"
+
+    def cancel(self, user, seat):
+        return self.project.cancel_seat(user, seat) == "Cancellation successful"
+
+    def teardown(self):
+        self.project.seat_store.flush()
+
+class HanyProjectEngine:
+    """hany_project.SeatBookingSystem; needs streamlit to import the page module."""
+
+    def __init__(self, seat_count, confirm_delay):
+        self.seat_count = seat_count
+
+    def setup(self):
+        if not os.path.exists("seats.json"):
+            with open("seats.json", "w") as file:
+                json.dump({"seats": {f"seat_{i}": "available" for i in range(1, self.seat_count + 1)}}, file)
+        try:
+            import hany_project
+        except ImportError as error:
+            raise SystemExit(f"The hany engine needs streamlit installed: {error}")
+        self.system = hany_project.SeatBookingSystem()
+
+    def read(self):
+        self.system.get_seat_status()
+
+    def book(self, user, seat):
+        return self.system.book_seat(f"seat_{seat + 1}", f"user{user}")
+
+    def cancel(self, user, seat):
+        return False  # SeatBookingSystem has no cancellation
+
+    def teardown(self):
+        pass
+
+class CrudEngine:
+    """crud.py users: reads are get_users, a booking creates a user and a cancel deletes it."""
+
+    def __init__(self, seat_count, confirm_delay):
+        self.seat_count = seat_count
+
+    def setup(self):
+        if not os.path.exists("users.json"):
+            with open("users.json", "w") as file:
+                json.dump({"users": []}, file)
+        import crud
+        self.crud = crud
+
+    def read(self):
+        self.crud.get_users()
+
+    def book(self, user, seat):
+        try:
+            self.crud.create_user({"name": f"User {user}", "email": f"user{user}.{seat}@example.com"})
+        except self.crud.DuplicateUserError:
+            return False  # emails are unique, so rebooking a seat is a conflict
+        return True
+
+    def cancel(self, user, seat):
+        users = self.crud.get_users()
+        if not users:
+            return False
+        self.crud.delete_user(users[-1]["id"])
+        return True
+
+    def teardown(self):
+        pass
+
+class DaemonEngine:
+    """booking_daemon.BookingDaemon in this process, one BookingClient per worker thread."""
+
+    def __init__(self, seat_count, confirm_delay):
+        self.seat_count = seat_count
+        self.local = threading.local()
+
+    def setup(self):
+        import booking_daemon
+        self.booking_daemon = booking_daemon
+        self.socket_path = os.path.abspath("bench.sock")
+        if not os.path.exists(self.socket_path):
+            with open("seats.json", "w") as file:
+                json.dump(["Available" for _ in range(self.seat_count)], file)
+            self.daemon = booking_daemon.BookingDaemon(self.socket_path)
+            self.server = threading.Thread(target=self.daemon.serve_forever, daemon=True)
+            self.server.start()
+            while not os.path.exists(self.socket_path):
+                time.sleep(0.01)
+        else:
+            self.daemon = None
+
+    def client(self):
+        if not hasattr(self.local, "client"):
+            self.local.client = self.booking_daemon.BookingClient(self.socket_path)
+        return self.local.client
+
+    def read(self):
+        self.client().get_seat_status()
+
+    def book(self, user, seat):
+        return self.client().book_seat(user, seat) == "Booking successful"
+
+    def cancel(self, user, seat):
+        return self.client().cancel_seat(user, seat) == "Cancellation successful"
+
+    def teardown(self):
+        if self.daemon is not None:
+            self.daemon.shutdown()
+            self.server.join()
+
+ENGINE_CLASSES = {
+    "final": FinalProjectEngine,
+    "hany": HanyProjectEngine,
+    "crud": CrudEngine,
+    "daemon": DaemonEngine,
+}
+
+# ========================
+# Workload
+# ========================
+
+def seat_weights(seat_count, skew):
+    """Cumulative Zipf weights; skew 0 is uniform, larger values favour low seat numbers."""
+    total = 0.0
+    cumulative = []
+    for rank in range(1, seat_count + 1):
+        total += 1.0 / rank ** skew
+        cumulative.append(total)
+    return cumulative
+
+def run_worker(engine, worker_id, config, start_barrier=None):
+    """Run one worker's share of operations; return a list of (op, seconds, ok)."""
+    rng = random.Random(config["seed"] + worker_id)
+    seats = range(config["seats"])
+    weights = seat_weights(config["seats"], config["skew"])
+    user = worker_id + 1
+    booked = []
+    samples = []
+    if start_barrier is not None:
+        start_barrier.wait()
+    for _ in range(config["ops"]):
+        if rng.random() < config["read_ratio"]:
+            op = "read"
+            started = time.perf_counter()
+            engine.read()
+            ok = True
+        elif booked and rng.random() < 0.5:
+            op = "cancel"
+            seat = booked.pop(rng.randrange(len(booked)))
+            started = time.perf_counter()
+            ok = engine.cancel(user, seat)
+        else:
+            op = "book"
+            seat = rng.choices(seats, cum_weights=weights)[0]
+            started = time.perf_counter()
+            ok = engine.book(user, seat)
+            if ok:
+                booked.append(seat)
+        samples.append((op, time.perf_counter() - started, ok))
+        if config["think_ms"]:
+            time.sleep(rng.expovariate(1000.0 / config["think_ms"]))
+    return samples
+
+def _process_worker(args):
+    worker_id, config, workdir = args
+    os.chdir(workdir)
+    engine = ENGINE_CLASSES[config["engine"]](config["seats"], config["confirm_delay"])
+    engine.setup()
+    try:
+        return run_worker(engine, worker_id, config)
+    finally:
+        engine.teardown()
+
+def run_benchmark(config):
+    workdir = tempfile.mkdtemp(prefix="booking-bench-")
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    if config["mode"] == "processes" and config["engine"] not in PROCESS_ENGINES:
+        raise ValueError(f"the {config['engine']} engine cannot be shared between processes; "
+                         f"processes mode supports {', '.join(PROCESS_ENGINES)}")
+    previous_dir = os.getcwd()
+    previous_shared_seats = os.environ.get(SHARED_SEATS_ENV)
+    os.chdir(workdir)
+    try:
+        if config["mode"] == "processes":
+            if config["engine"] == "final":
+                # Otherwise every worker keeps a private SeatStore and their
+                # flushes overwrite each other's seats.json, so the processes
+                # never contend for the same seats. Workers inherit the variable.
+                os.environ[SHARED_SEATS_ENV] = os.path.join(workdir, SHARED_SEATS_FILE)
+            # The first engine instance creates the files the workers then share
+            engine = ENGINE_CLASSES[config["engine"]](config["seats"], config["confirm_delay"])
+            engine.setup()
+            started = time.perf_counter()
+            # spawn, not fork: a forked worker would inherit the parent's engine,
+            # open file and all, and flock gives no exclusion on a shared open file
+            with multiprocessing.get_context("spawn").Pool(config["workers"]) as pool:
+                results = pool.map(_process_worker, [(i, config, workdir) for i in range(config["workers"])])
+            elapsed = time.perf_counter() - started
+            engine.teardown()
+        else:
+            engine = ENGINE_CLASSES[config["engine"]](config["seats"], config["confirm_delay"])
+            engine.setup()
+            barrier = threading.Barrier(config["workers"] + 1)
+            results = [None] * config["workers"]
+
+            def target(worker_id):
+                results[worker_id] = run_worker(engine, worker_id, config, barrier)
+
+            threads = [threading.Thread(target=target, args=(i,)) for i in range(config["workers"])]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            started = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            engine.teardown()
+    finally:
+        os.chdir(previous_dir)
+        if previous_shared_seats is None:
+            os.environ.pop(SHARED_SEATS_ENV, None)
+        else:
+            os.environ[SHARED_SEATS_ENV] = previous_shared_seats
+    return summarize([sample for samples in results for sample in samples], elapsed)
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(samples, elapsed):
+    by_op = {}
+    for op, seconds, ok in samples:
+        by_op.setdefault(op, []).append((seconds, ok))
+    latency = {}
+    for op, values in sorted(by_op.items()):
+        times = sorted(seconds * 1000 for seconds, _ in values)
+        latency[op] = {
+            "count": len(times),
+            "mean": sum(times) / len(times),
+            "p50": percentile(times, 0.50),
+            "p95": percentile(times, 0.95),
+            "p99": percentile(times, 0.99),
+        }
+    bookings = by_op.get("book", [])
+    conflicts = sum(1 for _, ok in bookings if not ok)
+    return {
+        "ops": len(samples),
+        "duration_s": elapsed,
+        "throughput_ops_per_s": len(samples) / elapsed if elapsed else None,
+        "latency_ms": latency,
+        "conflict_rate": conflicts / len(bookings) if bookings else 0.0,
+    }
+
+def print_report(config, results):
+    print(f"engine={config['engine']} mode={config['mode']} workers={config['workers']} "
+          f"read_ratio={config['read_ratio']} skew={config['skew']}")
+    print(f"{results['ops']} ops in {results['duration_s']:.2f} s "
+          f"= {results['throughput_ops_per_s']:.1f} ops/s, conflict rate {results['conflict_rate']:.1%}")
+    for op, stats in results["latency_ms"].items():
+        print(f"  {op:<6} n={stats['count']:<6} p50={stats['p50']:.2f} ms "
+              f"p95={stats['p95']:.2f} ms p99={stats['p99']:.2f} ms")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the booking engines.")
+    parser.add_argument("--engine", choices=ENGINES, default="final")
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=100, help="operations per worker")
+    parser.add_argument("--seats", type=int, default=100)
+    parser.add_argument("--read-ratio", type=float, default=0.5)
+    parser.add_argument("--skew", type=float, default=0.0, help="Zipf exponent for seat popularity; 0 is uniform")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a worker's operations")
+    parser.add_argument("--confirm-delay", type=float, default=0.0,
+                        help="final_project.CONFIRM_DELAY during the run (the app uses 0.5)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--lock-stats", action="store_true",
+                        help="report lock wait/hold times (threads mode only)")
+    parser.add_argument("--output", default="bench_results.jsonl")
+    args = parser.parse_args(argv)
+    if args.mode == "processes" and args.engine not in PROCESS_ENGINES:
+        parser.error(f"--mode processes supports --engine {' / '.join(PROCESS_ENGINES)} only")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    if args.lock_stats:
+        lock_stats.reset_lock_stats()
+    results = run_benchmark(config)
+    print_report(config, results)
+    if args.lock_stats:
+        print(lock_stats.format_lock_report())
+        results["locks"] = {
+            name: lock["totals"] for name, lock in lock_stats.lock_report().items()
+        }
+    record = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "config": config,
+        "results": results,
+    }
+    with open(args.output, "a") as file:
+        file.write(json.dumps(record) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import itertools
+import json
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
+from datetime import datetime
+
+from history_log import HistoryLog
+from seat_store import SeatStore
+
+# ========================
+# Single-writer booking daemon over a Unix domain socket
+# ========================
+
+SOCKET_PATH = "booking_daemon.sock"
+SEATS_FILE = "seats.json"
+HISTORY_FILE = "booking_history.jsonl"
+LEGACY_HISTORY_FILE = "booking_history.json"
+
+# Most requests the writer applies before one group commit
+MAX_BATCH = 256
+
+# Every message is a 4-byte big-endian length followed by that many bytes of JSON
+FRAME_HEADER = struct.Struct(">I")
+
+def send_frame(sock, message):
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(len(body)) + body)
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+def recv_frame(sock):
+    """Return the next decoded message, or None once the peer has closed."""
+    header = _recv_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    body = _recv_exactly(sock, FRAME_HEADER.unpack(header)[0])
+    if body is None:
+        return None
+    return json.loads(body)
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def validate_request(request):
+    """Return an error message for a malformed request, or None if it is well formed."""
+    if not isinstance(request, dict):
+        return "Invalid request: expected a JSON object"
+    if not (request.get("id") is None or _is_int(request["id"]) or isinstance(request["id"], str)):
+        return "Invalid request: id must be an integer or a string"
+    op = request.get("op")
+    if not isinstance(op, str):
+        return "Invalid request: op must be a string"
+    if op in ("book", "cancel"):
+        if not _is_int(request.get("user_id")):
+            return "Invalid request: user_id must be an integer"
+        if not _is_int(request.get("seat_number")):
+            return "Invalid seat number"
+    return None
+
+class BookingDaemon:
+    """Owns the seat state and booking history and serves every front end.
+
+    One reader thread per connection decodes requests onto a shared queue.
+    A single writer thread drains the queue in batches, applies each batch in
+    memory, then writes the history and seats once for the whole batch
+    before answering. Because only this process touches the files, requests
+    from different processes cannot race each other.
+
+    Requests look like {"id": 1, "op": "book", "user_id": 3, "seat_number": 4}
+    with op one of "book", "cancel" or "status"; each reply carries the same
+    id and a "result".
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH, seats_file=SEATS_FILE, history_file=HISTORY_FILE):
+        self.socket_path = socket_path
+        # The writer flushes after every batch, so the background flusher is only a safety net
+        self.seat_store = SeatStore(seats_file, flush_interval=60.0, flush_threshold=sys.maxsize)
+        self.history_log = HistoryLog(history_file, legacy_path=LEGACY_HISTORY_FILE)
+        self.requests = queue.Queue()
+        self._server = None
+        self._running = False
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        self._server.listen()
+        self._running = True
+        writer = threading.Thread(target=self._writer_loop, name="BookingWriter", daemon=True)
+        writer.start()
+        try:
+            while self._running:
+                try:
+                    conn, _ = self._server.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._reader_loop, args=(conn,), daemon=True).start()
+        finally:
+            self._server.close()
+            self.requests.put(None)
+            writer.join()
+            self.history_log.close()
+            self.seat_store.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        """Stop accepting connections; serve_forever then commits and returns."""
+        self._running = False
+        if self._server is not None:
+            # shutdown() wakes a thread blocked in accept(), close() alone does not
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _reader_loop(self, conn):
+        send_lock = threading.Lock()
+        with conn:
+            while True:
+                try:
+                    request = recv_frame(conn)
+                except (OSError, ValueError):
+                    break
+                if request is None:
+                    break
+                self.requests.put((conn, send_lock, request))
+
+    def _writer_loop(self):
+        while True:
+            first = self.requests.get()
+            if first is None:
+                return
+            batch = [first]
+            # Group commit: take whatever else is already waiting
+            while len(batch) < MAX_BATCH:
+                try:
+                    item = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.requests.put(None)
+                    break
+                batch.append(item)
+
+            history = []
+            replies = [(conn, send_lock, self._apply_safely(request, history)) for conn, send_lock, request in batch]
+            try:
+                if history:
+                    self.history_log.append_many(history)
+                self.seat_store.flush()
+            except Exception as error:
+                # Keep the writer alive; callers learn their change may not be on disk
+                for _, _, reply in replies:
+                    reply["result"] = f"Commit failed: {error}"
+
+            for conn, send_lock, reply in replies:
+                try:
+                    with send_lock:
+                        send_frame(conn, reply)
+                except OSError:
+                    pass  # The client went away; its changes are already committed
+
+    def _apply_safely(self, request, history):
+        """Apply one request; a bad or failing request gets an error reply instead of stopping the writer."""
+        error = validate_request(request)
+        if error is not None:
+            request_id = request.get("id") if isinstance(request, dict) else None
+            # Only echo ids the client could have sent; anything else is unhashable junk
+            if not (_is_int(request_id) or isinstance(request_id, str)):
+                request_id = None
+            return {"id": request_id, "result": error}
+        try:
+            return self._apply(request, history)
+        except Exception as error:
+            return {"id": request.get("id"), "result": f"Error: {error}"}
+
+    def _apply(self, request, history):
+        op = request["op"]
+        reply = {"id": request.get("id")}
+        if op == "status":
+            reply["result"] = self.seat_store.snapshot()
+            return reply
+        if op not in ("book", "cancel"):
+            reply["result"] = f"Unknown operation: {op}"
+            return reply
+
+        user_id = request["user_id"]
+        seat_number = request["seat_number"]
+        if seat_number < 0 or seat_number >= len(self.seat_store):
+            reply["result"] = "Invalid seat number"
+            return reply
+
+        booked = f"Booked by User {user_id}"
+        if op == "book":
+            if self.seat_store.compare_and_set(seat_number, "Available", booked):
+                reply["result"] = "Booking successful"
+                action = "booked"
+            else:
+                reply["result"] = "Seat already booked"
+                return reply
+        else:
+            status = self.seat_store.get(seat_number)
+            if status == "Available":
+                reply["result"] = "Already not booked"
+                return reply
+            if not self.seat_store.compare_and_set(seat_number, booked, "Available"):
+                reply["result"] = "Seat not booked by you"
+                return reply
+            reply["result"] = "Cancellation successful"
+            action = "cancelled"
+
+        now = datetime.now().isoformat()
+        history.append({
+            "user_id": user_id,
+            "seat_number": seat_number,
+            "start_time": now,
+            "end_time": now,
+            "thread_id": threading.get_ident(),
+            "action": action
+        })
+        return reply
+
+class BookingClient:
+    """Client for BookingDaemon.
+
+    ``call`` sends one request and waits for its reply. ``pipeline`` sends a
+    list of requests back to back and then collects all the replies, so the
+    daemon can commit them together.
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self._ids = itertools.count(1)
+
+    def call(self, op, **fields):
+        return self.pipeline([dict(fields, op=op)])[0]
+
+    def pipeline(self, requests):
+        """Send every request, then return their results in the same order."""
+        ids = []
+        frames = bytearray()
+        for request in requests:
+            request_id = next(self._ids)
+            ids.append(request_id)
+            body = json.dumps(dict(request, id=request_id), separators=(",", ":")).encode("utf-8")
+            frames += FRAME_HEADER.pack(len(body)) + body
+        self.sock.sendall(frames)
+
+        results = {}
+        while len(results) < len(ids):
+            reply = recv_frame(self.sock)
+            if reply is None:
+                raise ConnectionError("booking daemon closed the connection")
+            results[reply["id"]] = reply["result"]
+        return [results[request_id] for request_id in ids]
+
+    def book_seat(self, user_id, seat_number):
+        return self.call("book", user_id=user_id, seat_number=seat_number)
+
+    def cancel_seat(self, user_id, seat_number):
+        return self.call("cancel", user_id=user_id, seat_number=seat_number)
+
+    def get_seat_status(self):
+        return self.call("status")
+
+    def close(self):
+        self.sock.close()
+
+if __name__ == "__main__":
+    daemon = BookingDaemon(sys.argv[1] if len(sys.argv) > 1 else SOCKET_PATH)
+    print(f"Booking daemon listening on {daemon.socket_path}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,66 @@
+import threading
+from collections import deque
+
+# ========================
+# Versioned change notifications
+# ========================
+
+class ChangeFeed:
+    """Per-key change events stamped with a monotonically increasing version.
+
+    Front ends remember the last version they applied and ask for
+    ``changes_since(version)`` to get only what changed after it, so a refresh
+    costs time proportional to the number of changes rather than the number
+    of keys. Only the latest ``max_events`` publishes are kept; a reader that
+    falls further behind than that is told to resynchronise from a snapshot.
+    Callbacks registered with ``subscribe`` are called on the publishing
+    thread.
+    """
+
+    def __init__(self, max_events=10000):
+        self.lock = threading.Lock()
+        self.version = 0
+        self._events = deque(maxlen=max_events)
+        self._subscribers = []
+
+    def publish(self, changes):
+        """Record a dict of key -> new value; return the version it was given."""
+        if not changes:
+            return self.version
+        with self.lock:
+            self.version += 1
+            version = self.version
+            self._events.append((version, dict(changes)))
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(version, changes)
+        return version
+
+    def changes_since(self, version):
+        """Return ``(current_version, changes)`` for everything after ``version``.
+
+        ``changes`` maps each changed key to its latest value. It is None when
+        the requested version is too old to answer from the retained events.
+        """
+        with self.lock:
+            if version >= self.version:
+                return self.version, {}
+            if not self._events or self._events[0][0] > version + 1:
+                return self.version, None
+            changes = {}
+            # Walk backwards so we stop as soon as we reach already-seen events
+            for event_version, event_changes in reversed(self._events):
+                if event_version <= version:
+                    break
+                for key, value in event_changes.items():
+                    changes.setdefault(key, value)
+            return self.version, changes
+
+    def subscribe(self, callback):
+        """Call ``callback(version, changes)`` after every publish."""
+        with self.lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self._subscribers.remove(callback)
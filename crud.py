@@ -1,55 +1,394 @@
+import asyncio
+import atexit
+import bisect
 import json
 import concurrent.futures
+import os
 import queue
+import sys
 import threading
+import time
+from types import MappingProxyType
+from lock_stats import make_lock
+from parse_cache import load_json
+from sqlite_store import DATABASE_ENV, SQLiteDatabase, SQLiteUserBackend
 
 # JSON file name
 JSON_FILE = 'users.json'
 
 # Lock for thread-safe access to the JSON file
-lock = threading.Lock()
+lock = make_lock("crud.lock")
 
-# Load data from the JSON file
+# How long the committer waits for more mutations before writing a batch
+COMMIT_WINDOW = 0.005
+
+# Secondary indexes on user fields: field -> whether values must be unique.
+# Keys are case-folded, so "Jane@Example.com" and "jane@example.com" clash.
+USER_INDEXES = {'email': True, 'name': False}
+
+class DuplicateUserError(ValueError):
+    """Raised when a create or update would repeat a unique field's value."""
+
+# Load data from the JSON file; the result is read-only and reparsed only
+# when the file has changed
 def load_data():
-    with open(JSON_FILE, 'r') as file:
-        return json.load(file)
+    return load_json(JSON_FILE)
 
-# Save data to the JSON file
+# Save data to the JSON file; readers never see a half-written file
 def save_data(data):
-    with open(JSON_FILE, 'w') as file:
+    tmp_path = JSON_FILE + '.tmp'
+    with open(tmp_path, 'w') as file:
         json.dump(data, file, indent=4)
+        # Committed futures promise the batch is on disk
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, JSON_FILE)
+
+class JsonUserBackend:
+    """Keeps the users in JSON_FILE, rewritten in full for every batch."""
+
+    def load(self):
+        return load_data()
+
+    def prepare(self, users, next_id, changed_ids):
+        # Caller holds lock
+        return {'users': [dict(user) for user in users.values()], 'next_id': next_id}
+
+    def write(self, payload):
+        save_data(payload)
+
+# In-memory user table
+class UserTable:
+    """Users keyed by id, loaded from the storage backend once.
+
+    Lookups, updates and deletes are dict operations instead of list scans.
+    Ids come from a monotonic sequence that is saved with the users as
+    "next_id", so an id is never handed out twice, even after deletes.
+
+    Records are read-only mappings that writers replace rather than modify,
+    so readers can share them safely. ``snapshot`` caches an immutable tuple
+    of all users; writers drop it under ``lock`` and the next reader builds a
+    new one, so readers never wait on each other for the common case of an
+    unchanged table.
+
+    Mutations are applied in memory and then queued with ``commit``. A
+    committer thread writes the file once for every mutation queued within
+    COMMIT_WINDOW, then resolves each caller's future. Reads see a mutation
+    as soon as it is applied, before it is on disk.
+
+    Every field in USER_INDEXES is indexed as {key: ids}, with the keys also
+    kept sorted for prefix searches. ``put`` keeps the indexes in step and
+    refuses to repeat a unique value. Duplicates already in the file are
+    kept as they are, but no new ones can be added.
+
+    The backend is JsonUserBackend, or SQLiteUserBackend when BOOKING_DB
+    names a database; it is told which ids changed in each batch.
+
+    ``users`` is kept in ascending id order (ids only grow), so the snapshot
+    is sorted too and a page after a given id is found by bisection.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.changed_ids = set()
+        self.users = None
+        self.next_id = 1
+        self.snapshot = None
+        self.indexes = {field: {} for field in USER_INDEXES}
+        self.index_keys = {field: [] for field in USER_INDEXES}
+        self.pending = []
+        self.commit_ready = threading.Condition(threading.Lock())
+        self._committer = None
+        # Held from prepare until write returns, so the committer and the
+        # final flush at exit never write at the same time
+        self._write_lock = threading.Lock()
+
+    def ensure_loaded(self):
+        # Caller holds lock
+        if self.users is not None:
+            return
+        data = self.backend.load()
+        self.users = {}
+        duplicates = []
+        for user in sorted(data['users'], key=lambda user: user['id']):
+            if user['id'] in self.users:
+                duplicates.append(user)
+            else:
+                self.users[user['id']] = _frozen(user)
+        self.next_id = max(data.get('next_id', 1), max(self.users, default=0) + 1)
+        # Older files got ids from len(users) + 1, which collides after a
+        # delete; give any repeated id a fresh one
+        for user in duplicates:
+            user = dict(user, id=self.allocate_id())
+            self.users[user['id']] = MappingProxyType(user)
+            self.changed_ids.add(user['id'])
+        for user in self.users.values():
+            self._index(user)
+        if duplicates:
+            self.commit(None)
+
+    def allocate_id(self):
+        user_id = self.next_id
+        self.next_id += 1
+        return user_id
+
+    def check_unique(self, user, user_id=None):
+        """Raise DuplicateUserError if ``user`` would repeat a unique value held by another user."""
+        # Caller holds lock
+        old = self.users.get(user_id)
+        for field, unique in USER_INDEXES.items():
+            key = _index_key(user.get(field))
+            if not unique or key is None:
+                continue
+            # Keeping a value that was already duplicated on load is allowed
+            if old is not None and _index_key(old.get(field)) == key:
+                continue
+            if self.indexes[field].get(key):
+                raise DuplicateUserError(f"A user with {field} {user[field]!r} already exists")
+
+    def put(self, user):
+        # Caller holds lock and has called check_unique
+        old = self.users.get(user['id'])
+        if old is not None:
+            self._unindex(old)
+        record = self.users[user['id']] = MappingProxyType(user)
+        self._index(record)
+        self.changed_ids.add(user['id'])
+        self.snapshot = None
+
+    def remove(self, user_id):
+        # Caller holds lock
+        removed = self.users.pop(user_id, None)
+        if removed is not None:
+            self._unindex(removed)
+            self.changed_ids.add(user_id)
+            self.snapshot = None
+        return removed
+
+    def _index(self, user):
+        for field in USER_INDEXES:
+            key = _index_key(user.get(field))
+            if key is None:
+                continue
+            ids = self.indexes[field].get(key)
+            if ids is None:
+                ids = self.indexes[field][key] = set()
+                bisect.insort(self.index_keys[field], key)
+            ids.add(user['id'])
+
+    def _unindex(self, user):
+        for field in USER_INDEXES:
+            key = _index_key(user.get(field))
+            ids = self.indexes[field].get(key)
+            if ids is None:
+                continue
+            ids.discard(user['id'])
+            if not ids:
+                del self.indexes[field][key]
+                keys = self.index_keys[field]
+                del keys[bisect.bisect_left(keys, key)]
+
+    def lookup(self, field, value):
+        """Return the users whose ``field`` equals ``value``, lowest id first."""
+        # Caller holds lock
+        ids = self.indexes[field].get(_index_key(value), ())
+        return [self.users[user_id] for user_id in sorted(ids)]
+
+    def prefix_search(self, field, prefix, limit=None):
+        """Return users whose ``field`` starts with ``prefix``, in key order."""
+        # Caller holds lock
+        prefix = _index_key(prefix)
+        keys = self.index_keys[field]
+        results = []
+        for position in range(bisect.bisect_left(keys, prefix), len(keys)):
+            key = keys[position]
+            if not key.startswith(prefix):
+                break
+            for user_id in sorted(self.indexes[field][key]):
+                results.append(self.users[user_id])
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+    def current_snapshot(self):
+        """Return the immutable tuple of all users, building it if a write dropped it."""
+        snapshot = self.snapshot
+        if snapshot is None:
+            with lock:
+                self.ensure_loaded()
+                if self.snapshot is None:
+                    self.snapshot = tuple(self.users.values())
+                snapshot = self.snapshot
+        return snapshot
+
+    def page(self, after_id, limit):
+        """Return up to ``limit`` users with ids above ``after_id`` (None for the start)."""
+        snapshot = self.current_snapshot()
+        start = 0 if after_id is None else bisect.bisect_right(snapshot, after_id, key=lambda user: user['id'])
+        return snapshot[start:start + limit]
+
+    def commit(self, result):
+        """Queue the current state for writing; return a future that gets ``result`` once it is on disk."""
+        # Caller holds lock
+        future = concurrent.futures.Future()
+        with self.commit_ready:
+            self.pending.append((future, result))
+            if self._committer is None:
+                self._committer = threading.Thread(target=self._commit_loop, name="UserTableCommitter", daemon=True)
+                self._committer.start()
+            self.commit_ready.notify()
+        return future
+
+    def _commit_loop(self):
+        while True:
+            with self.commit_ready:
+                while not self.pending:
+                    self.commit_ready.wait()
+            time.sleep(COMMIT_WINDOW)
+            self.flush()
+
+    def flush(self):
+        """Write every queued mutation with a single save and resolve their futures."""
+        with self._write_lock:
+            with lock:
+                with self.commit_ready:
+                    batch, self.pending = self.pending, []
+                if not batch:
+                    return
+                changed_ids, self.changed_ids = self.changed_ids, set()
+                payload = self.backend.prepare(self.users, self.next_id, changed_ids)
+            # The write happens outside lock so readers and writers carry on;
+            # _write_lock keeps batches in order
+            try:
+                self.backend.write(payload)
+            except Exception as error:
+                with lock:
+                    self.changed_ids |= changed_ids
+                for future, _ in batch:
+                    future.set_exception(error)
+            else:
+                for future, result in batch:
+                    future.set_result(result)
+
+def _index_key(value):
+    return None if value is None else str(value).casefold()
+
+def _frozen(user):
+    # load_data's cached records are already read-only; SQLite rows are plain dicts
+    return user if isinstance(user, MappingProxyType) else MappingProxyType(user)
+
+def _default_backend():
+    database_path = os.environ.get(DATABASE_ENV)
+    if database_path:
+        return SQLiteUserBackend(SQLiteDatabase(database_path))
+    return JsonUserBackend()
+
+table = UserTable(_default_backend())
+atexit.register(table.flush)
+
+# Mutations: the submit_* functions return a future that resolves once the
+# change is on disk; the plain functions wait for it
 
 # Create operation
-def create_user(user_data):
+def submit_create_user(user_data):
     with lock:
-        data = load_data()
-        user_data['id'] = len(data['users']) + 1
-        data['users'].append(user_data)
-        save_data(data)
+        table.ensure_loaded()
+        table.check_unique(user_data)
+        user = dict(user_data, id=table.allocate_id())
+        table.put(user)
+        return table.commit(user['id'])
+
+def create_user(user_data):
+    return submit_create_user(user_data).result()
 
-# Read operation
+# Read operations: immutable snapshots, no lock once the table is loaded
 def get_users():
+    return table.current_snapshot()
+
+def get_user(user_id):
+    if table.users is None:
+        with lock:
+            table.ensure_loaded()
+    return table.users.get(user_id)
+
+# Paginated reads. The cursor is the id of the last user on the previous
+# page, so a page stays stable while users are added or removed around it.
+def list_users(cursor=None, limit=100, fields=None):
+    """Return ``(users, next_cursor)`` for one page in id order; next_cursor is None after the last page.
+
+    ``fields`` limits each returned user to those keys. Before the table has
+    been loaded, a backend that can seek (SQLite) serves the page itself, so
+    the first page costs only that page.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, not {limit}")
+    read_page = getattr(table.backend, 'read_page', None)
+    if table.users is None and read_page is not None:
+        users = [_frozen(user) for user in read_page(cursor, limit)]
+    else:
+        users = list(table.page(cursor, limit))
+    next_cursor = users[-1]['id'] if len(users) == limit else None
+    if fields is not None:
+        users = [{field: user.get(field) for field in fields} for user in users]
+    return users, next_cursor
+
+def iter_users(fields=None, page_size=1000):
+    """Lazily yield every user in id order, reading ``page_size`` users at a time."""
+    cursor = None
+    while True:
+        users, cursor = list_users(cursor, page_size, fields)
+        yield from users
+        if cursor is None:
+            return
+
+# Index lookups
+def find_user_by_email(email):
+    with lock:
+        table.ensure_loaded()
+        users = table.lookup('email', email)
+    return users[0] if users else None
+
+def find_users_by_name(name):
+    with lock:
+        table.ensure_loaded()
+        return table.lookup('name', name)
+
+def search_users(field, prefix, limit=None):
+    """Return users whose indexed ``field`` starts with ``prefix`` (case-insensitive)."""
     with lock:
-        data = load_data()
-        return data['users']
+        table.ensure_loaded()
+        return table.prefix_search(field, prefix, limit)
 
 # Update operation
-def update_user(user_id, updated_data):
+def submit_update_user(user_id, updated_data):
     with lock:
-        data = load_data()
-        for user in data['users']:
-            if user['id'] == user_id:
-                user['name'] = updated_data['name']
-                user['email'] = updated_data['email']
-                break
-        save_data(data)
+        table.ensure_loaded()
+        user = table.users.get(user_id)
+        if user is None:
+            return _resolved(False)
+        user = dict(user, name=updated_data['name'], email=updated_data['email'])
+        table.check_unique(user, user_id)
+        table.put(user)
+        return table.commit(True)
+
+def update_user(user_id, updated_data):
+    return submit_update_user(user_id, updated_data).result()
 
 # Delete operation
-def delete_user(user_id):
+def submit_delete_user(user_id):
     with lock:
-        data = load_data()
-        data['users'] = [user for user in data['users'] if user['id'] != user_id]
-        save_data(data)
+        table.ensure_loaded()
+        if table.remove(user_id) is None:
+            return _resolved(False)
+        return table.commit(True)
+
+def delete_user(user_id):
+    return submit_delete_user(user_id).result()
+
+def _resolved(result):
+    future = concurrent.futures.Future()
+    future.set_result(result)
+    return future
 
 # Multi-threading implementation
 def execute_crud_operation(operation, *args):
@@ -62,6 +401,74 @@ def execute_crud_operation(operation, *args):
     elif operation == 'delete':
         delete_user(*args)
 
+# Asyncio implementation
+class AsyncUserStore:
+    """Coroutine front end to the user table for use from one event loop.
+
+    Every call that may take ``lock`` (loading the table, queueing a
+    mutation, rebuilding the snapshot or an index lookup) runs on a small
+    bounded executor, so the loop never waits behind the committer. Mutation
+    commit futures are then awaited with asyncio.wrap_future while the
+    committer thread writes the batch. Any number of coroutines can share
+    one store without a thread each.
+    """
+
+    def __init__(self, max_workers=4):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="AsyncUserStore")
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def create(self, user_data):
+        return await asyncio.wrap_future(await self._run(submit_create_user, user_data))
+
+    async def get_all(self):
+        return await self._run(get_users)
+
+    async def get(self, user_id):
+        return await self._run(get_user, user_id)
+
+    async def list(self, cursor=None, limit=100, fields=None):
+        return await self._run(list_users, cursor, limit, fields)
+
+    async def find_by_email(self, email):
+        return await self._run(find_user_by_email, email)
+
+    async def search(self, field, prefix, limit=None):
+        return await self._run(search_users, field, prefix, limit)
+
+    async def update(self, user_id, updated_data):
+        return await asyncio.wrap_future(await self._run(submit_update_user, user_id, updated_data))
+
+    async def delete(self, user_id):
+        return await asyncio.wrap_future(await self._run(submit_delete_user, user_id))
+
+    def close(self):
+        self.executor.shutdown()
+
+async def main_async():
+    store = AsyncUserStore()
+    user_data_list = [
+        {'name': 'John Doe', 'email': 'john@example.com'},
+        {'name': 'Jane Doe', 'email': 'jane@example.com'},
+        {'name': 'Bob Smith', 'email': 'bob@example.com'}
+    ]
+    try:
+        # Creates, reads, an update and a delete all in flight together
+        results = await asyncio.gather(
+            *(store.create(user_data) for user_data in user_data_list),
+            *(store.get_all() for _ in range(5)),
+            store.update(1, {'name': 'John Doe Updated', 'email': 'john.updated@example.com'}),
+            store.delete(1),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, tuple):
+                result = [dict(user) for user in result]
+            print(result)
+    finally:
+        store.close()
+
 def main():
     # Create some sample data
     user_data_list = [
@@ -92,7 +499,7 @@ def main():
             futures.append(executor.submit(execute_crud_operation, 'read'))
         for future in futures:
             users = future.result()
-            print(users)
+            print([dict(user) for user in users])
 
     # Update users concurrently
     user_id = 1
@@ -114,4 +521,7 @@ def main():
             future.result()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    if '--async' in sys.argv[1:]:
+        asyncio.run(main_async())
+    else:
+        main()
\ No newline at end of file
@@ -1,13 +1,43 @@
+import atexit
 import threading
 import time
 import tkinter as tk
 from tkinter import messagebox, ttk
 import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
+from history_index import HistoryIndex
+from history_log import HistoryLog
+from lock_stats import make_lock
+from seat_holds import HoldManager
+from seat_store import SeatStore
+from shared_seats import SharedSeatEngine
+from sqlite_store import DATABASE_ENV, SQLiteDatabase, SQLiteHistoryLog, SQLiteSeatStore
 
 # JSON file paths
 SEATS_FILE = "seats.json"
-HISTORY_FILE = "booking_history.json"
+HISTORY_FILE = "booking_history.jsonl"
+LEGACY_HISTORY_FILE = "booking_history.json"
+
+# Lock striping: every seat maps onto one of SEAT_LOCK_STRIPES locks, so users
+# cancelling different seats do not wait on each other. Bookings go through
+# seat holds instead and never block on these locks.
+SEAT_LOCK_STRIPES = 16
+seat_locks = [make_lock("final_project.seat_locks") for _ in range(SEAT_LOCK_STRIPES)]
+
+def seat_lock(seat_number):
+    """Return the stripe lock guarding the given seat."""
+    return seat_locks[seat_number % SEAT_LOCK_STRIPES]
+
+def lock_all_seats():
+    """Acquire every stripe lock, always in index order so callers cannot deadlock."""
+    stack = ExitStack()
+    for lock in seat_locks:
+        stack.enter_context(lock)
+    return stack
 
 # Initialize JSON files if they do not exist
 def initialize_json_files():
@@ -17,109 +47,171 @@ def initialize_json_files():
     except FileExistsError:
         pass
 
-    try:
-        with open(HISTORY_FILE, "x") as file:
-            json.dump([], file)
-    except FileExistsError:
-        pass
+# When DATABASE_ENV names a SQLite file, seats and history are stored there
+# (see sqlite_store.py) instead of in the JSON files.
+database = None
+
+def initialize_database():
+    global database
+    database_path = os.environ.get(DATABASE_ENV)
+    if database is None and database_path:
+        database = SQLiteDatabase(database_path)
+        atexit.register(database.close)
+    return database
+
+# In-memory seat store, flushed to SEATS_FILE in the background. When runner.py
+# sets SHARED_SEATS_ENV, every launched process uses one shared seat map instead.
+SHARED_SEATS_ENV = "SEAT_ENGINE_FILE"
+seat_store = None
+
+def initialize_seat_store():
+    global seat_store
+    if seat_store is None:
+        shared_path = os.environ.get(SHARED_SEATS_ENV)
+        if shared_path:
+            seat_store = SharedSeatEngine.open_or_create(shared_path, SEATS_FILE)
+        elif initialize_database():
+            seat_store = SQLiteSeatStore(database)
+            # Holds left by processes that exited would block their seats forever;
+            # holds of processes still running are kept
+            seat_store.release_held_seats()
+        else:
+            seat_store = SeatStore(SEATS_FILE)
+        atexit.register(seat_store.close)
+    return seat_store
+
+# Seat holds; abandoned holds are released after HOLD_TTL seconds.
+# CONFIRM_DELAY stands in for payment / confirmation work.
+HOLD_TTL = 30.0
+CONFIRM_DELAY = 0.5
+hold_manager = None
+
+def initialize_hold_manager():
+    global hold_manager
+    if hold_manager is None:
+        hold_manager = HoldManager(seat_store, ttl=HOLD_TTL)
+        atexit.register(hold_manager.close)
+    return hold_manager
 
 # Load seat data
 def load_seat_data():
-    with open(SEATS_FILE, "r") as file:
-        return json.load(file)
-
-# Save seat data
-def save_seat_data(data):
-    with open(SEATS_FILE, "w") as file:
-        json.dump(data, file, indent=4)
+    return seat_store.snapshot()
+
+# Append-only booking history; the old JSON array file is migrated on first use.
+# The active segment is archived in the background once it holds
+# HISTORY_SEGMENT_ENTRIES entries; the viewer and the index still reach
+# archived entries.
+# history_index answers per-user / per-seat / time-range lookups without a scan.
+HISTORY_SEGMENT_ENTRIES = 100000
+history_log = None
+history_index = None
+
+def initialize_history_log():
+    global history_log, history_index
+    if history_log is None and initialize_database():
+        # The history table's SQL indexes answer HistoryIndex's queries
+        history_log = history_index = SQLiteHistoryLog(database)
+    elif history_log is None:
+        history_log = HistoryLog(
+            HISTORY_FILE, legacy_path=LEGACY_HISTORY_FILE, max_segment_entries=HISTORY_SEGMENT_ENTRIES
+        )
+        atexit.register(history_log.close)
+        history_index = HistoryIndex(history_log)
+        atexit.register(history_index.save)
+    return history_log
 
 # Load booking history
 def load_booking_history():
-    with open(HISTORY_FILE, "r") as file:
-        return json.load(file)
-
-# Save booking history
-def save_booking_history(history):
-    with open(HISTORY_FILE, "w") as file:
-        json.dump(history, file, indent=4)
+    return list(history_log.iter_entries())
 
 # Booking system
-def book_seat(user_id, seat_number):
+def hold_seat(user_id, seat_number):
+    """Reserve a seat for HOLD_TTL seconds; return the Hold, or None if unavailable."""
+    return hold_seats(user_id, [seat_number])
+
+def hold_seats(user_id, seat_numbers):
+    """Reserve a group of seats all-or-nothing; return the Hold, or None."""
+    if any(seat_number < 0 or seat_number >= len(seat_store) for seat_number in seat_numbers):
+        return None
+    return hold_manager.hold_seats(user_id, seat_numbers)
+
+def confirm_hold(hold, start_time=None):
+    """Turn a hold into a booking and record it; return False if the hold expired."""
+    if not hold_manager.confirm_hold(hold.token):
+        return False
+    end_time = datetime.now().isoformat()
     thread_id = threading.get_ident()
+    history_log.append_many([{
+        "user_id": hold.user_id,
+        "seat_number": seat_number,
+        "start_time": start_time or end_time,
+        "end_time": end_time,
+        "thread_id": thread_id,
+        "action": "booked"
+    } for seat_number in hold.seat_numbers])
+    return True
+
+def release_hold(hold):
+    """Give held seats back without booking them."""
+    return hold_manager.release_hold(hold.token)
+
+def book_seat(user_id, seat_number):
+    return book_seats(user_id, [seat_number])
+
+def book_seats(user_id, seat_numbers):
+    """Book a group of seats for one user; either every seat is booked or none is."""
     start_time = datetime.now().isoformat()
 
-    with seats_lock:
-        seats = load_seat_data()
-        if seat_number < 0 or seat_number >= len(seats):
-            return "Invalid seat number"
+    if not seat_numbers or any(seat_number < 0 or seat_number >= len(seat_store) for seat_number in seat_numbers):
+        return "Invalid seat number"
 
-        if seats[seat_number] == "Available":
-            time.sleep(0.5)
-            seats[seat_number] = f"Booked by User {user_id}"
-            save_seat_data(seats)
-
-            end_time = datetime.now().isoformat()
-            history = load_booking_history()
-            history.append({
-                "user_id": user_id,
-                "seat_number": seat_number,
-                "start_time": start_time,
-                "end_time": end_time,
-                "thread_id": thread_id,
-                "action": "booked"
-            })
-            save_booking_history(history)
-
-            return "Booking successful"
-        else:
-            return "Seat already booked"
+    hold = hold_seats(user_id, seat_numbers)
+    if hold is None:
+        return "Seat already booked"
+
+    # Confirmation runs without any lock held; the hold keeps the seats reserved
+    time.sleep(CONFIRM_DELAY)
+    if not confirm_hold(hold, start_time):
+        return "Seat hold expired"
+
+    return "Booking successful"
 
 def cancel_seat(user_id, seat_number):
     thread_id = threading.get_ident()
     start_time = datetime.now().isoformat()
 
-    with seats_lock:
-        seats = load_seat_data()
-        if seat_number < 0 or seat_number >= len(seats):
+    with seat_lock(seat_number):
+        if seat_number < 0 or seat_number >= len(seat_store):
             return "Invalid seat number"
         
-        if seats[seat_number] == "Available":
+        status = seat_store.get(seat_number)
+        if status == "Available":
             return "Already not booked"
 
-        if seats[seat_number] == f"Booked by User {user_id}":
-            time.sleep(0.5)
-            seats[seat_number] = "Available"
-            save_seat_data(seats)
-
-            end_time = datetime.now().isoformat()
-            history = load_booking_history()
-            history.append({
-                "user_id": user_id,
-                "seat_number": seat_number,
-                "start_time": start_time,
-                "end_time": end_time,
-                "thread_id": thread_id,
-                "action": "cancelled"
-            })
-            save_booking_history(history)
-
-            return "Cancellation successful"
-        else:
+        if status != f"Booked by User {user_id}":
             return "Seat not booked by you"
 
-def gui_cancel_seat(user_id, seat_number):
-    """GUI callback to cancel a booking."""
-    result = cancel_seat(user_id, seat_number)
-    messagebox.showinfo("Cancellation Result", result)
-    update_gui_seat_availability()
-    
+        time.sleep(CONFIRM_DELAY)
+        # Another process may have cleared the seat while we slept
+        if not seat_store.compare_and_set(seat_number, status, "Available"):
+            return "Seat not booked by you"
+
+        history_log.append({
+            "user_id": user_id,
+            "seat_number": seat_number,
+            "start_time": start_time,
+            "end_time": datetime.now().isoformat(),
+            "thread_id": thread_id,
+            "action": "cancelled"
+        })
+
+        return "Cancellation successful"
+
 def clear_all_bookings():
     """Admin function to clear all bookings."""
-    with seats_lock:
-        seats = ["Available" for _ in range(10)]
-        save_seat_data(seats)
-        history = load_booking_history()
-        history.append({
+    with lock_all_seats():
+        seat_store.set_all(["Available" for _ in range(len(seat_store))])
+        history_log.append({
             "user_id": "admin",
             "seat_number": "all",
             "start_time": datetime.now().isoformat(),
@@ -127,35 +219,159 @@ def clear_all_bookings():
             "thread_id": threading.get_ident(),
             "action": "cleared all bookings"
         })
-        save_booking_history(history)
-        update_gui_seat_availability()
-        return "All bookings cleared!"
+    update_gui_seat_availability()
+    return "All bookings cleared!"
+
+# Background work for the GUI: bookings run on gui_executor and their results
+# are handed back to the Tk thread through gui_results, which is drained by
+# poll_gui_results via root.after. Tk widgets are only touched on the Tk thread.
+GUI_WORKERS = 8
+GUI_POLL_MS = 50
+gui_executor = ThreadPoolExecutor(max_workers=GUI_WORKERS, thread_name_prefix="BookingWorker")
+gui_results = queue.Queue()
+
+def run_in_background(func, args, on_done):
+    """Run func(*args) on the worker pool; on_done(result) is later called on the Tk thread."""
+    future = gui_executor.submit(func, *args)
+    future.add_done_callback(lambda done: gui_results.put((on_done, done)))
+
+def poll_gui_results():
+    """Deliver finished background results and seat changes to the GUI, then reschedule."""
+    while True:
+        try:
+            on_done, future = gui_results.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            result = future.result()
+        except Exception as error:
+            result = f"Error: {error}"
+        on_done(result)
+    # Cheap when nothing changed; also picks up bookings made by other processes
+    update_gui_seat_availability()
+    root.after(GUI_POLL_MS, poll_gui_results)
 
 # GUI Functions
+# Last seat store version painted by the GUI; -1 forces a full first paint
+gui_seen_version = -1
+
+# The user panel shows SEAT_PAGE_SIZE seats at a time, so a large venue
+# does not need a label per seat. seat_labels[i] shows seat first_shown_seat + i.
+SEAT_PAGE_SIZE = 20
+first_shown_seat = 0
+
+def paint_seat_label(label, seat_number, status):
+    label.config(text=f"Seat {seat_number}: {status}", fg="green" if status == "Available" else "red")
+
 def update_gui_seat_availability():
-    """Update the seat availability display in the GUI."""
-    seats = load_seat_data()
-    for i, seat_label in enumerate(seat_labels):
-        seat_label.config(text=f"Seat {i}: {seats[i]}", fg="green" if seats[i] == "Available" else "red")
+    """Repaint only the visible seat labels that changed since the last refresh."""
+    global gui_seen_version
+    gui_seen_version, changes = seat_store.changes_since(gui_seen_version)
+    for seat_number, status in changes.items():
+        index = seat_number - first_shown_seat
+        if 0 <= index < len(seat_labels):
+            paint_seat_label(seat_labels[index], seat_number, status)
+
+# Rows shown at once in the history viewer, and how often tail mode polls
+HISTORY_PAGE_SIZE = 20
+HISTORY_TAIL_MS = 1000
+
+def format_history_entry(entry):
+    return (
+        f"User {entry['user_id']} {entry['action']} Seat {entry['seat_number']} "
+        f"at {entry['start_time']} (Thread ID: {entry['thread_id']})"
+    )
 
 def view_admin_history():
-    """Admin view for booking history."""
-    history = load_booking_history()
+    """Admin view for booking history.
+
+    Only the visible page of entries is read from the history log; scrolling
+    fetches the next page on demand. In tail mode the view stays at the end
+    of the log and appends entries as they are written.
+    """
     admin_history_window = tk.Toplevel(root)
     admin_history_window.title("Admin: Booking History")
-    admin_history_window.geometry("600x400")
-
-    text_widget = tk.Text(admin_history_window, font=("Arial", 12), wrap=tk.WORD)
-    text_widget.pack(expand=True, fill=tk.BOTH)
-    if history:
-        for entry in history:
-            text_widget.insert(
-                tk.END,
-                f"User {entry['user_id']} {entry['action']} Seat {entry['seat_number']} "
-                f"at {entry['start_time']} (Thread ID: {entry['thread_id']})\n"
-            )
-    else:
-        text_widget.insert(tk.END, "No history available.\n")
+    admin_history_window.geometry("700x450")
+
+    tail_mode = tk.BooleanVar(value=False)
+    controls = tk.Frame(admin_history_window)
+    controls.pack(fill=tk.X)
+    count_label = tk.Label(controls, font=("Arial", 10), anchor="w")
+    count_label.pack(side=tk.LEFT, padx=5)
+
+    body = tk.Frame(admin_history_window)
+    body.pack(expand=True, fill=tk.BOTH)
+    scrollbar = tk.Scrollbar(body, orient=tk.VERTICAL)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    listbox = tk.Listbox(body, font=("Arial", 12), height=HISTORY_PAGE_SIZE, activestyle="none")
+    listbox.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+    # Number of the first entry shown and the history size when last read,
+    # both counting archived entries so a rotation does not shift them
+    view = {"first": 0, "total": 0}
+
+    def update_scrollbar():
+        total = view["total"]
+        if total:
+            shown = listbox.size()
+            scrollbar.set(view["first"] / total, (view["first"] + shown) / total)
+        else:
+            scrollbar.set(0, 1)
+        count_label.config(text=f"{total} entries")
+
+    def show_page(first):
+        total = history_log.count(include_archived=True)
+        first = max(0, min(first, total - HISTORY_PAGE_SIZE))
+        listbox.delete(0, tk.END)
+        for entry in history_log.read_page(first, HISTORY_PAGE_SIZE, include_archived=True):
+            listbox.insert(tk.END, format_history_entry(entry))
+        if not total:
+            listbox.insert(tk.END, "No history available.")
+        view["first"], view["total"] = first, total
+        update_scrollbar()
+
+    def on_scroll(action, amount, unit=None):
+        if action == "moveto":
+            show_page(int(float(amount) * view["total"]))
+        else:
+            step = HISTORY_PAGE_SIZE if unit == "pages" else 1
+            show_page(view["first"] + int(amount) * step)
+
+    def on_mouse_wheel(event):
+        if event.num == 4 or event.delta > 0:
+            show_page(view["first"] - 3)
+        else:
+            show_page(view["first"] + 3)
+        return "break"
+
+    def poll_tail():
+        if not admin_history_window.winfo_exists():
+            return
+        if tail_mode.get():
+            total = history_log.count(include_archived=True)
+            if view["first"] + listbox.size() < view["total"] or not view["total"] or total < view["total"]:
+                # Jump to the end the first time tail mode sees the log, or
+                # after the log was replaced by a shorter one
+                show_page(total)
+            elif total > view["total"]:
+                # Only fetch the entries written since the last poll
+                for entry in history_log.read_page(view["total"], total - view["total"], include_archived=True):
+                    listbox.insert(tk.END, format_history_entry(entry))
+                overflow = listbox.size() - HISTORY_PAGE_SIZE
+                if overflow > 0:
+                    listbox.delete(0, overflow - 1)
+                view["first"], view["total"] = total - listbox.size(), total
+                update_scrollbar()
+        admin_history_window.after(HISTORY_TAIL_MS, poll_tail)
+
+    scrollbar.config(command=on_scroll)
+    listbox.bind("<MouseWheel>", on_mouse_wheel)
+    listbox.bind("<Button-4>", on_mouse_wheel)
+    listbox.bind("<Button-5>", on_mouse_wheel)
+    tk.Checkbutton(controls, text="Live tail", variable=tail_mode).pack(side=tk.RIGHT, padx=5)
+
+    show_page(0)
+    admin_history_window.after(HISTORY_TAIL_MS, poll_tail)
 
 # UI Enhancements
 def create_tabbed_interface():
@@ -177,13 +393,35 @@ def create_user_panel(frame):
     global seat_labels
     seat_labels.clear()
 
-    for i in range(10):
+    seat_count = len(seat_store)
+    page_size = min(SEAT_PAGE_SIZE, seat_count)
+    for i in range(page_size):
         seat_label = tk.Label(frame, text=f"Seat {i}: ", font=("Arial", 12), width=30, anchor="w")
         seat_label.grid(row=i, column=0, padx=10, pady=5)
         seat_labels.append(seat_label)
 
+    pager_frame = tk.Frame(frame)
+    pager_frame.grid(row=page_size, column=0, padx=10, pady=5)
+    page_label = tk.Label(pager_frame, text="", font=("Arial", 12))
+
+    def show_seat_page(first):
+        global first_shown_seat
+        first_shown_seat = max(0, min(first, seat_count - page_size))
+        for i, seat_label in enumerate(seat_labels):
+            seat_number = first_shown_seat + i
+            paint_seat_label(seat_label, seat_number, seat_store.get(seat_number))
+        page_label.config(text=f"Seats {first_shown_seat}-{first_shown_seat + page_size - 1} of {seat_count}")
+
+    tk.Button(pager_frame, text="< Prev", font=("Arial", 12),
+              command=lambda: show_seat_page(first_shown_seat - page_size)).grid(row=0, column=0, padx=5)
+    page_label.grid(row=0, column=1, padx=5)
+    tk.Button(pager_frame, text="Next >", font=("Arial", 12),
+              command=lambda: show_seat_page(first_shown_seat + page_size)).grid(row=0, column=2, padx=5)
+    if page_size:
+        show_seat_page(0)
+
     controls_frame = tk.Frame(frame)
-    controls_frame.grid(row=11, column=0, padx=10, pady=10)
+    controls_frame.grid(row=page_size + 1, column=0, padx=10, pady=10)
 
     tk.Label(controls_frame, text="User ID:", font=("Arial", 12)).grid(row=0, column=0, padx=5, pady=5)
     user_id_entry = tk.Entry(controls_frame, font=("Arial", 12))
@@ -193,28 +431,49 @@ def create_user_panel(frame):
     seat_number_entry = tk.Entry(controls_frame, font=("Arial", 12))
     seat_number_entry.grid(row=1, column=1, padx=5, pady=5)
 
+    # Results are shown in a status line instead of a modal dialog, since many
+    # operations may finish while the user keeps clicking.
+    result_label = tk.Label(frame, text="", font=("Arial", 12), anchor="w")
+    result_label.grid(row=page_size + 2, column=0, padx=10, pady=5)
+    pending = {"Book Seat": 0, "Cancel Booking": 0}
+
+    def show_pending(button, title):
+        count = pending[title]
+        button.config(text=f"{title} ({count} pending)" if count else title)
+
+    def start_operation(button, title, func, args, result_title):
+        pending[title] += 1
+        show_pending(button, title)
+
+        def on_done(result):
+            pending[title] -= 1
+            show_pending(button, title)
+            result_label.config(text=f"{result_title} (User {args[0]}, Seat {args[1]}): {result}")
+
+        run_in_background(func, args, on_done)
+
     def on_book_button_click():
         try:
             user_id = int(user_id_entry.get())
             seat_number = int(seat_number_entry.get())
-            result = book_seat(user_id, seat_number)
-            messagebox.showinfo("Booking Result", result)
-            update_gui_seat_availability()
         except ValueError:
             messagebox.showerror("Input Error", "Please enter valid numbers for User ID and Seat Number.")
+            return
+        start_operation(book_button, "Book Seat", book_seat, (user_id, seat_number), "Booking Result")
 
     def on_cancel_button_click():
         try:
             user_id = int(user_id_entry.get())
             seat_number = int(seat_number_entry.get())
-            gui_cancel_seat(user_id, seat_number)
         except ValueError:
             messagebox.showerror("Input Error", "Please enter valid numbers for User ID and Seat Number.")
+            return
+        start_operation(cancel_button, "Cancel Booking", cancel_seat, (user_id, seat_number), "Cancellation Result")
     book_button = tk.Button(controls_frame, text="Book Seat", font=("Arial", 12), command=on_book_button_click)
     book_button.grid(row=2, column=0, columnspan=2, pady=10)
     
     cancel_button = tk.Button(frame, text="Cancel Booking", font=("Arial", 12), command=on_cancel_button_click)
-    cancel_button.grid(row=13, column=0, columnspan=2, pady=10)
+    cancel_button.grid(row=page_size + 3, column=0, columnspan=2, pady=10)
 
 def create_admin_panel(frame):
     clear_button = tk.Button(frame, text="Clear All Bookings", font=("Arial", 12), command=lambda: messagebox.showinfo("Admin Action", clear_all_bookings()))
@@ -223,18 +482,62 @@ def create_admin_panel(frame):
     history_button = tk.Button(frame, text="View Booking History", font=("Arial", 12), command=view_admin_history)
     history_button.grid(row=1, column=0, padx=10, pady=10)
 
+    search_frame = tk.Frame(frame)
+    search_frame.grid(row=2, column=0, padx=10, pady=10)
+    tk.Label(search_frame, text="User ID / Seat Number:", font=("Arial", 12)).grid(row=0, column=0, padx=5, pady=5)
+    search_entry = tk.Entry(search_frame, font=("Arial", 12))
+    search_entry.grid(row=0, column=1, padx=5, pady=5)
+
+    # Lookups may first have to catch the index up (after a lost .idx file,
+    # every archived segment), so they run on the worker pool
+    def show_lookup(title, func, value):
+        def on_done(entries):
+            if isinstance(entries, str):
+                messagebox.showerror("History Lookup", entries)
+            else:
+                show_history_results(title, entries)
+        run_in_background(func, (value,), on_done)
+
+    def find_by_user():
+        value = search_entry.get().strip()
+        show_lookup(f"History for User {value}", history_index.entries_for_user, value)
+
+    def find_by_seat():
+        value = search_entry.get().strip()
+        show_lookup(f"History for Seat {value}", history_index.entries_for_seat, value)
+
+    tk.Button(search_frame, text="Find by User", font=("Arial", 12), command=find_by_user).grid(row=1, column=0, padx=5, pady=5)
+    tk.Button(search_frame, text="Find by Seat", font=("Arial", 12), command=find_by_seat).grid(row=1, column=1, padx=5, pady=5)
+
+def show_history_results(title, entries):
+    """Show the result of an indexed history lookup in its own window."""
+    results_window = tk.Toplevel(root)
+    results_window.title(f"Admin: {title}")
+    results_window.geometry("700x400")
+
+    listbox = tk.Listbox(results_window, font=("Arial", 12), activestyle="none")
+    listbox.pack(expand=True, fill=tk.BOTH)
+    for entry in entries:
+        listbox.insert(tk.END, format_history_entry(entry))
+    if not entries:
+        listbox.insert(tk.END, "No matching history.")
+
 # Main function
 if __name__ == "__main__":
     initialize_json_files()
+    initialize_seat_store()
+    initialize_history_log()
+    initialize_hold_manager()
 
     root = tk.Tk()
     root.title("Movie Ticket Booking System")
     root.geometry("800x600")
 
-    seats_lock = threading.Lock()
     seat_labels = []
 
     create_tabbed_interface()
     update_gui_seat_availability()
+    poll_gui_results()
 
     root.mainloop()
+    gui_executor.shutdown(wait=True)
@@ -2,14 +2,23 @@ import streamlit as st
 import threading
 import time
 import json
-from datetime import datetime
+import os
+from collections import namedtuple
+from types import MappingProxyType
+from change_feed import ChangeFeed
+from lock_stats import make_lock
+from parse_cache import load_json
+from thread_activity import get_activity_log
 
 # ========================
 # Database and Logs Simulation (File-based)
 # ========================
 
 DATABASE_FILE = 'seats.json'
-THREAD_LOG_FILE = 'thread_logs.json'
+THREAD_LOG_FILE = 'thread_activity.jsonl'
+
+# Shared by every rerun and session of this process
+activity_log = get_activity_log(THREAD_LOG_FILE)
 
 def initialize_database():
     """ Initialize the seat database. """
@@ -18,41 +27,53 @@ def initialize_database():
         json.dump(initial_data, file)
 
 def load_seat_data():
-    """ Load seat data from the file. """
-    with open(DATABASE_FILE, 'r') as file:
-        return json.load(file)
+    """ Load seat data from the file (read-only, reparsed only after it changes). """
+    return load_json(DATABASE_FILE)
 
 def save_seat_data(data):
-    """ Save updated seat data to the file. """
-    with open(DATABASE_FILE, 'w') as file:
-        json.dump(data, file)
-
-def initialize_thread_logs():
-    """ Initialize the thread logs file. """
-    with open(THREAD_LOG_FILE, 'w') as file:
-        json.dump({}, file)
+    """ Save updated seat data to the file, via a temporary file so readers never see half of it. """
+    tmp_path = DATABASE_FILE + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file, default=dict)  # loaded data is read-only mappingproxies
+    os.replace(tmp_path, DATABASE_FILE)
 
 def load_thread_logs():
-    """ Load thread logs from the file. """
-    try:
-        with open(THREAD_LOG_FILE, 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        initialize_thread_logs()
-        return {}
-
-def save_thread_logs(logs):
-    """ Save thread logs to the file. """
-    with open(THREAD_LOG_FILE, 'w') as file:
-        json.dump(logs, file)
+    """ Return each thread's latest start / end times from the activity log. """
+    return activity_log.summary()
 
 # ========================
 # Thread-safe Seat Booking System
 # ========================
 
+# Read-only view of the seats at one version
+SeatSnapshot = namedtuple("SeatSnapshot", ["version", "seats", "available", "booked"])
+
 class SeatBookingSystem:
+    """ Seat state in memory, shared by every session and rerun of the app.
+
+    The seats are read from DATABASE_FILE once. A booking changes memory
+    under the lock and writes the file before returning, and every change
+    bumps ``changes.version``. ``snapshot()`` returns a read-only view that
+    is only rebuilt after the version moves, so pages render from memory.
+    Use get_booking_system() to get the single instance for this process.
+    """
+
     def __init__(self):
-        self.lock = threading.Lock()
+        self.lock = make_lock("SeatBookingSystem.lock")
+        self.changes = ChangeFeed()
+        try:
+            data = load_seat_data()
+        except FileNotFoundError:
+            initialize_database()
+            data = load_seat_data()
+        self._seats = dict(data['seats'])
+        self._snapshot = None
+
+    def _changed(self, changes):
+        # Caller holds self.lock; writing under it keeps the file in step with memory
+        self.changes.publish(changes)
+        self._snapshot = None
+        save_seat_data({'seats': self._seats})
 
     def book_seat(self, seat_id, user_name):
         """ Attempt to book a seat. """
@@ -60,43 +81,58 @@ class SeatBookingSystem:
         log_thread_start(thread_id)
 
         with self.lock:
-            seat_data = load_seat_data()
-            if seat_data['seats'][seat_id] == 'available':
-                seat_data['seats'][seat_id] = user_name
-                save_seat_data(seat_data)
+            if self._seats[seat_id] == 'available':
+                self._seats[seat_id] = user_name
+                self._changed({seat_id: user_name})
                 log_thread_end(thread_id)
                 return True  # Booking successful
             else:
                 log_thread_end(thread_id)
                 return False  # Seat is already booked
 
+    def reset_all(self):
+        """ Make every seat available again. """
+        with self.lock:
+            changes = {seat_id: 'available' for seat_id, status in self._seats.items() if status != 'available'}
+            self._seats.update(changes)
+            self._changed(changes)
+
+    def snapshot(self):
+        """ Return the SeatSnapshot for the current version. """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self.lock:
+                if self._snapshot is None:
+                    seats = MappingProxyType(dict(self._seats))
+                    self._snapshot = SeatSnapshot(
+                        self.changes.version,
+                        seats,
+                        tuple(seat for seat, status in seats.items() if status == 'available'),
+                        MappingProxyType({seat: user for seat, user in seats.items() if user != 'available'}),
+                    )
+                snapshot = self._snapshot
+        return snapshot
+
     def get_seat_status(self):
         """ Return the current status of all seats. """
-        with self.lock:
-            return load_seat_data()['seats']
+        return self.snapshot().seats
+
+@st.cache_resource
+def get_booking_system():
+    """ The process-wide SeatBookingSystem, kept across reruns and shared by all sessions. """
+    return SeatBookingSystem()
 
 # ========================
 # Helper Functions for Thread Logging
 # ========================
 
 def log_thread_start(thread_id):
-    """ Log thread start time and status in the log file. """
-    logs = load_thread_logs()
-    logs[thread_id] = {
-        "name" : thread_id,
-        "status": "Running",
-        "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "end_time": None
-    }
-    save_thread_logs(logs)
+    """ Record a thread start; the activity log is written in the background. """
+    activity_log.record(thread_id, "Running")
 
 def log_thread_end(thread_id):
-    """ Log thread end time and status in the log file. """
-    logs = load_thread_logs()
-    if thread_id in logs:
-        logs[thread_id]["status"] = "Completed"
-        logs[thread_id]["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    save_thread_logs(logs)
+    """ Record a thread end; the activity log is written in the background. """
+    activity_log.record(thread_id, "Completed")
 
 # ========================
 # Streamlit GUI
@@ -105,19 +141,8 @@ def log_thread_end(thread_id):
 st.title("🎟️ Movie Ticket Booking System")
 st.write("Book your seat for the movie. Avoid double booking and experience a live dynamic seat update.")
 
-# Initialize database and thread logs if they do not exist
-try:
-    load_seat_data()
-except FileNotFoundError:
-    initialize_database()
-
-try:
-    load_thread_logs()
-except FileNotFoundError:
-    initialize_thread_logs()
-
-# Create an instance of the SeatBookingSystem
-booking_system = SeatBookingSystem()
+# One booking system (and one lock) for every session; it creates the database if needed
+booking_system = get_booking_system()
 
 # Sidebar Navigation
 page = st.sidebar.selectbox("Navigation", ["Booking Page", "Admin Page", "Thread Activity"])
@@ -125,7 +150,8 @@ page = st.sidebar.selectbox("Navigation", ["Booking Page", "Admin Page", "Thread
 if page == "Booking Page":
     # Display current seat status
     st.subheader("Available Seats")
-    seats = booking_system.get_seat_status()
+    snapshot = booking_system.snapshot()
+    seats = snapshot.seats
 
     # Display seats in a grid layout
     columns = st.columns(5)  # 5 seats per row
@@ -138,7 +164,7 @@ if page == "Booking Page":
             col.write(f"{seat_id} ({status})")
 
     st.subheader("Book Your Seat")
-    selected_seat = st.selectbox("Select a Seat", options=[seat for seat, status in seats.items() if status == 'available'])
+    selected_seat = st.selectbox("Select a Seat", options=snapshot.available)
     user_name = st.text_input("Enter your name")
 
     if st.button("Book Now"):
@@ -153,9 +179,9 @@ if page == "Booking Page":
 elif page == "Admin Page":
     st.title("🔧 Admin Dashboard")
     st.write("Manage seat bookings and view seat status.")
-    seat_data = load_seat_data()
-    booked_seats = {seat: user for seat, user in seat_data['seats'].items() if user != 'available'}
-    available_seats = {seat: user for seat, user in seat_data['seats'].items() if user == 'available'}
+    snapshot = booking_system.snapshot()
+    booked_seats = snapshot.booked
+    available_seats = snapshot.available
 
     st.subheader("Booked Seats")
     if booked_seats:
@@ -164,11 +190,11 @@ elif page == "Admin Page":
     else:
         st.write("No seats are currently booked.")
     st.subheader("Available Seats")
-    st.write(", ".join(available_seats.keys()) if available_seats else "No seats are currently available.")
+    st.write(", ".join(available_seats) if available_seats else "No seats are currently available.")
 
     # Button to reset all seats
     if st.button("Reset All Seats"):
-        initialize_database()
+        booking_system.reset_all()
         st.success("All seats have been reset to available.")
         st.experimental_rerun()
 
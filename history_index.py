@@ -0,0 +1,152 @@
+import bisect
+import json
+import os
+import threading
+from array import array
+
+# ========================
+# Incremental indexes over the booking history log
+# ========================
+
+# Fields indexed by exact value; the time index buckets entries by the hour
+# of their start_time ("2024-12-11T23")
+INDEXED_FIELDS = ("user_id", "seat_number", "action")
+HOUR_KEY_LENGTH = 13
+
+# Bumped when entry numbering in the saved file changes
+INDEX_FORMAT = 2
+
+# Entries read from the log per batch while catching up
+UPDATE_BATCH = 10000
+
+class HistoryIndex:
+    """Per-user, per-seat, per-action and per-hour entry lists for a HistoryLog.
+
+    Each index maps a value to the numbers of the entries that carry it, so
+    a query reads only the matching entries from the log. Before answering,
+    the index catches up with entries appended since it last looked,
+    including ones written by other processes. ``save`` writes it next to the
+    log, and a later start loads that file and only indexes the newer tail.
+    Entry numbers count across the whole history (``include_archived``), so
+    the index keeps working through rotations and its queries also return
+    archived entries.
+    """
+
+    def __init__(self, history_log, path=None):
+        self.history_log = history_log
+        self.path = path or history_log.path + ".idx"
+        self.lock = threading.Lock()
+        if not self._load():
+            self._reset()
+
+    def _reset(self):
+        self.indexed_count = 0
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        self.by_hour = {}
+        self._hours = []
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        # Older index files numbered the active segment only
+        if data.get("format") != INDEX_FORMAT:
+            return False
+        # A log that shrank has been replaced; the index is stale
+        if data["indexed_count"] > self.history_log.count(include_archived=True):
+            return False
+        self.indexed_count = data["indexed_count"]
+        self.indexes = {
+            field: {key: array("q", numbers) for key, numbers in data["indexes"][field].items()}
+            for field in INDEXED_FIELDS
+        }
+        self.by_hour = {hour: array("q", numbers) for hour, numbers in data["by_hour"].items()}
+        self._hours = sorted(self.by_hour)
+        return True
+
+    def save(self):
+        """Persist the index so the next start only has to index new entries."""
+        with self.lock:
+            data = {
+                "format": INDEX_FORMAT,
+                "indexed_count": self.indexed_count,
+                "indexes": {
+                    field: {key: numbers.tolist() for key, numbers in index.items()}
+                    for field, index in self.indexes.items()
+                },
+                "by_hour": {hour: numbers.tolist() for hour, numbers in self.by_hour.items()},
+            }
+        # Every process sharing the log saves at exit; keep their files apart
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, self.path)
+
+    def update(self):
+        """Index every entry appended to the log since the last update."""
+        with self.lock:
+            while True:
+                base_count = self.history_log.base_count
+                if self.indexed_count < base_count:
+                    # Rebuilding, or the log was rotated before we saw its tail
+                    indexed_before = self.indexed_count
+                    for entry in self.history_log.iter_archived_entries(self.indexed_count):
+                        if self.indexed_count >= base_count:
+                            break
+                        self._add(self.indexed_count, entry)
+                        self.indexed_count += 1
+                    if self.indexed_count == indexed_before:
+                        # Archived segments are missing; skip what cannot be read
+                        self.indexed_count = base_count
+                    continue
+                entries = self.history_log.read_page(self.indexed_count - base_count, UPDATE_BATCH)
+                # A rotation while reading renumbers the active segment; read again
+                if self.history_log.base_count != base_count:
+                    continue
+                if not entries:
+                    return
+                for entry in entries:
+                    self._add(self.indexed_count, entry)
+                    self.indexed_count += 1
+
+    def _add(self, number, entry):
+        for field in INDEXED_FIELDS:
+            key = str(entry.get(field))
+            self.indexes[field].setdefault(key, array("q")).append(number)
+        hour = (entry.get("start_time") or "")[:HOUR_KEY_LENGTH]
+        if hour:
+            if hour not in self.by_hour:
+                self.by_hour[hour] = array("q")
+                bisect.insort(self._hours, hour)
+            self.by_hour[hour].append(number)
+
+    # Queries
+    def _lookup(self, field, value):
+        self.update()
+        with self.lock:
+            numbers = list(self.indexes[field].get(str(value), ()))
+        return self.history_log.read_entries(numbers, include_archived=True)
+
+    def entries_for_user(self, user_id):
+        return self._lookup("user_id", user_id)
+
+    def entries_for_seat(self, seat_number):
+        return self._lookup("seat_number", seat_number)
+
+    def entries_for_action(self, action):
+        return self._lookup("action", action)
+
+    def entries_between(self, start_time, end_time):
+        """Return entries whose start_time lies in [start_time, end_time) (ISO strings)."""
+        self.update()
+        with self.lock:
+            first = bisect.bisect_left(self._hours, start_time[:HOUR_KEY_LENGTH])
+            last = bisect.bisect_right(self._hours, end_time[:HOUR_KEY_LENGTH])
+            numbers = [number for hour in self._hours[first:last] for number in self.by_hour[hour]]
+        # Whole hours were selected, so trim the partial ones at either end
+        return [
+            entry for entry in self.history_log.read_entries(sorted(numbers), include_archived=True)
+            if start_time <= entry["start_time"] < end_time
+        ]
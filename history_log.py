@@ -0,0 +1,434 @@
+import gzip
+import json
+import os
+import shutil
+import threading
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ========================
+# Append-only booking history (one JSON object per line)
+# ========================
+
+class HistoryLog:
+    """Line-delimited booking history.
+
+    Appending writes a single line at the end of the file, so its cost does
+    not depend on how much history already exists. Entries are read back
+    lazily with ``iter_entries()``, or a page at a time with ``read_page()``,
+    which seeks straight to the first requested line using an in-memory index
+    of line offsets. The index only ever scans bytes appended since it was
+    last updated, including lines written by other processes.
+
+    The file only holds the active segment. ``rotate()`` moves it into a
+    gzip-compressed segment under ``archive_dir`` and records a snapshot of
+    the seat state it leads to, so rebuilding that state only replays the
+    entries written since (see ``reconstruct_state``). Once the active
+    segment reaches ``max_segment_entries`` a background thread rotates it.
+    The replay runs without any lock held; only the final renames wait for
+    appenders, so neither appenders nor readers pay for the replay.
+
+    Several processes may share one log. Appends and the commit step of a
+    rotation hold an exclusive lock on ``path + ".lock"``, so no process
+    appends while another archives the file.
+
+    ``base_count`` is the number of entries already archived. Entry numbers
+    are relative to the active segment unless ``include_archived=True`` is
+    passed, in which case they count from the very first entry ever written
+    and archived entries are read back from their segments.
+    """
+
+    def __init__(self, path, legacy_path=None, archive_dir=None, max_segment_entries=None):
+        self.path = path
+        self.archive_dir = archive_dir or os.path.splitext(path)[0] + "_archive"
+        self.snapshot_path = path + ".snapshot"
+        self.max_segment_entries = max_segment_entries
+        # Re-entrant so rotation can reuse the public read methods
+        self.lock = threading.RLock()
+        self._lock_file = open(path + ".lock", "a+")
+        self._index_lock = threading.Lock()
+        self._rotating = False
+        with self._locked():
+            if legacy_path and not os.path.exists(path) and not os.path.exists(self.snapshot_path):
+                migrate_json_history(legacy_path, path)
+            raw_path = self._recover_rotation()
+        if raw_path is not None:
+            _compress_segment(raw_path)
+        self._open()
+
+    @contextmanager
+    def _locked(self):
+        """Keep other processes from appending or rotating; callers also hold self.lock."""
+        if fcntl:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _open(self):
+        # Caller holds self.lock (or is __init__)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self.snapshot = self._read_snapshot()
+        self.base_count = self.snapshot["base_count"]
+        with self._index_lock:
+            self._offsets = array("q")
+            self._indexed_bytes = 0
+        self._active_entries = self.count()
+
+    def _reopen_if_rotated(self):
+        """Follow a rotation done by another process sharing this log."""
+        # Caller holds self.lock
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if inode != self._inode:
+            self._file.close()
+            self._open()
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """Append several entries with a single write."""
+        lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self.lock, self._locked():
+            self._reopen_if_rotated()
+            self._file.write(lines)
+            self._file.flush()
+            self._active_entries += len(entries)
+            if self.max_segment_entries and self._active_entries >= self.max_segment_entries and not self._rotating:
+                self._rotating = True
+                threading.Thread(target=self._rotate_in_background, name="HistoryRotation", daemon=True).start()
+
+    def iter_entries(self):
+        """Yield history entries one at a time, oldest first."""
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def __iter__(self):
+        return self.iter_entries()
+
+    def _update_index(self):
+        """Record the offsets of complete lines appended since the last call."""
+        with self.lock:
+            self._reopen_if_rotated()
+        with self._index_lock:
+            with open(self.path, "rb") as file:
+                file.seek(self._indexed_bytes)
+                position = self._indexed_bytes
+                for line in file:
+                    # A line without its newline is still being written
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        self._offsets.append(position)
+                    position += len(line)
+            self._indexed_bytes = position
+
+    def count(self, include_archived=False):
+        """Return the number of entries in the active segment, or in the whole history."""
+        self._update_index()
+        with self._index_lock:
+            count = len(self._offsets)
+            base_count = self.base_count
+        return base_count + count if include_archived else count
+
+    def read_page(self, start, limit, include_archived=False):
+        """Return up to ``limit`` entries, starting with entry number ``start``."""
+        if include_archived:
+            start = max(start, 0)
+            return self.read_entries(range(start, min(start + limit, self.count(include_archived=True))),
+                                     include_archived=True)
+        self._update_index()
+        with self._index_lock:
+            offsets = self._offsets[max(start, 0):max(start, 0) + limit]
+        entries = []
+        if not offsets:
+            return entries
+        with open(self.path, "rb") as file:
+            file.seek(offsets[0])
+            while len(entries) < len(offsets):
+                line = file.readline()
+                if line.strip():
+                    entries.append(json.loads(line))
+        return entries
+
+    def read_entries(self, entry_numbers, include_archived=False):
+        """Return the entries with the given numbers, in the order asked for."""
+        if include_archived:
+            return self._read_all_entries(list(entry_numbers))
+        self._update_index()
+        with self._index_lock:
+            offsets = [self._offsets[number] for number in entry_numbers]
+        entries = []
+        with open(self.path, "rb") as file:
+            for offset in offsets:
+                file.seek(offset)
+                entries.append(json.loads(file.readline()))
+        return entries
+
+    def _read_all_entries(self, numbers):
+        while True:
+            self._update_index()
+            base_count = self.base_count
+            archived = self._read_archived([number for number in numbers if number < base_count])
+            active = self.read_entries([number - base_count for number in numbers if number >= base_count])
+            # A rotation in between renumbers the active segment; read again
+            if self.base_count == base_count:
+                break
+        active = iter(active)
+        return [archived[number] if number < base_count else next(active) for number in numbers]
+
+    def _read_archived(self, numbers):
+        """Return {number: entry} for archived entries, decompressing only the segments involved."""
+        wanted = set(numbers)
+        found = {}
+        segments = self._archived_segments()
+        for position, (first, path) in enumerate(segments):
+            end = segments[position + 1][0] if position + 1 < len(segments) else None
+            if not any(first <= number and (end is None or number < end) for number in wanted):
+                continue
+            for number, line in enumerate(_open_segment(path), first):
+                if number in wanted:
+                    found[number] = json.loads(line)
+        return found
+
+    # Snapshots and rotation
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"base_count": 0, "state": {}, "segments": [], "created": None}
+
+    def _segment_path(self, name):
+        return os.path.join(self.archive_dir, name)
+
+    def reconstruct_state(self):
+        """Return {seat_number: status} for booked seats, replaying only the active segment."""
+        with self.lock:
+            self._reopen_if_rotated()
+            state = dict(self.snapshot["state"])
+        for entry in self.iter_entries():
+            apply_history_entry(state, entry)
+        return state
+
+    def rotate(self):
+        """Archive the active segment and snapshot the state it leads to."""
+        prepared = self._prepare_rotation()
+        if prepared is None:
+            return
+        with self.lock, self._locked():
+            raw_path = self._commit_rotation(*prepared)
+        # Readers fall back to the uncompressed segment until this finishes
+        if raw_path is not None:
+            _compress_segment(raw_path)
+
+    def _rotate_in_background(self):
+        try:
+            self.rotate()
+        finally:
+            with self.lock:
+                self._rotating = False
+
+    def _prepare_rotation(self):
+        """Replay the active segment as it is now, without holding any lock.
+
+        Lines are only ever appended, so the first ``segment_bytes`` bytes stay
+        as they are while appenders carry on; _commit_rotation gives up if
+        another process rotated in the meantime.
+        """
+        with self.lock:
+            self._reopen_if_rotated()
+            self._update_index()
+            with self._index_lock:
+                entries, segment_bytes = len(self._offsets), self._indexed_bytes
+            inode, base_count, state = self._inode, self.base_count, dict(self.snapshot["state"])
+        if not entries:
+            return None
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_ino != inode:
+                return None
+            position = 0
+            for line in file:
+                if position >= segment_bytes:
+                    break
+                position += len(line)
+                if line.strip():
+                    apply_history_entry(state, json.loads(line))
+        return inode, base_count, entries, segment_bytes, state
+
+    def _commit_rotation(self, inode, base_count, entries, segment_bytes, state):
+        # Caller holds self.lock and _locked(). The snapshot is written first
+        # and names the segment it expects; _recover_rotation finishes the job
+        # after a crash. Returns the uncompressed segment for the caller to
+        # compress.
+        snapshot = self._read_snapshot()
+        try:
+            current_inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+        if snapshot["base_count"] != base_count or current_inode != inode:
+            return None  # Another process rotated first
+        name = f"segment-{base_count:012d}.jsonl"
+        os.makedirs(self.archive_dir, exist_ok=True)
+        _write_json_atomically(self.snapshot_path, {
+            "base_count": base_count + entries,
+            "state": state,
+            "segments": snapshot["segments"] + [name + ".gz"],
+            "segment_bytes": segment_bytes,
+            "created": datetime.now().isoformat(),
+        })
+        self._file.close()
+        self._split_segment(self._segment_path(name), segment_bytes)
+        self._open()
+        return self._segment_path(name)
+
+    def _split_segment(self, raw_path, segment_bytes):
+        """Make the first ``segment_bytes`` of the log a segment and keep the rest active.
+
+        Caller holds _locked(). The log file exists at every step, and each
+        step can be repeated after a crash.
+        """
+        if not os.path.exists(raw_path):
+            os.link(self.path, raw_path)
+        if not os.path.exists(self.path) or os.path.samefile(self.path, raw_path):
+            # Lines appended while the segment was replayed stay active
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(raw_path, "rb") as source, open(tmp_path, "wb") as target:
+                source.seek(segment_bytes)
+                shutil.copyfileobj(source, target)
+            os.replace(tmp_path, self.path)
+        os.truncate(raw_path, segment_bytes)
+
+    def _recover_rotation(self):
+        """Finish a rotation that was interrupted after its snapshot was written.
+
+        Caller holds _locked(). Returns the segment still to be compressed, if any.
+        """
+        snapshot = self._read_snapshot()
+        if not snapshot["segments"]:
+            return None
+        gz_path = self._segment_path(snapshot["segments"][-1])
+        raw_path = gz_path[:-len(".gz")]
+        if os.path.exists(gz_path):
+            return None
+        if "segment_bytes" in snapshot:
+            if not os.path.exists(raw_path) and not os.path.exists(self.path):
+                return None
+            self._split_segment(raw_path, snapshot["segment_bytes"])
+        elif not os.path.exists(raw_path):
+            # Rotated by an older version, which moved the whole file
+            if not os.path.exists(self.path):
+                return None
+            os.replace(self.path, raw_path)
+        return raw_path
+
+    def _archived_segments(self, snapshot=None):
+        """Return [(number of its first entry, path)] for every archived segment, oldest first."""
+        snapshot = snapshot or self._read_snapshot()
+        # Names look like segment-000000000123.jsonl.gz, 123 being the first entry's number
+        return [
+            (int(name[len("segment-"):].split(".")[0]), self._segment_path(name))
+            for name in snapshot["segments"]
+        ]
+
+    def iter_archived_entries(self, start=0):
+        """Yield archived entries from entry number ``start`` on, oldest first."""
+        snapshot = self._read_snapshot()
+        segments = self._archived_segments(snapshot)
+        for position, (first, path) in enumerate(segments):
+            if position + 1 < len(segments) and segments[position + 1][0] <= start:
+                continue
+            for number, line in enumerate(_open_segment(path), first):
+                # A segment still being split may hold lines that stay active
+                if number >= snapshot["base_count"]:
+                    return
+                if number >= start:
+                    yield json.loads(line)
+
+    def close(self):
+        with self.lock:
+            self._file.close()
+            self._lock_file.close()
+
+def apply_history_entry(state, entry):
+    """Apply one history entry to a {seat_number: status} map of booked seats."""
+    action = entry.get("action")
+    if action == "booked":
+        state[str(entry["seat_number"])] = f"Booked by User {entry['user_id']}"
+    elif action == "cancelled":
+        state.pop(str(entry["seat_number"]), None)
+    elif action == "cleared all bookings":
+        state.clear()
+
+def _open_segment(gz_path):
+    """Yield the non-blank lines of an archived segment, compressed or still being compressed."""
+    try:
+        file = gzip.open(gz_path, "rt", encoding="utf-8")
+    except FileNotFoundError:
+        try:
+            file = open(gz_path[:-len(".gz")], "r", encoding="utf-8")
+        except FileNotFoundError:
+            # Compression finished between the two attempts
+            file = gzip.open(gz_path, "rt", encoding="utf-8")
+    with file:
+        for line in file:
+            if line.strip():
+                yield line
+
+def _write_json_atomically(path, data):
+    # Per-process and per-thread, so writers sharing the directory never
+    # replace each other's half-written file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+def _compress_segment(raw_path):
+    """Gzip a finished segment next to itself and remove the uncompressed copy."""
+    # Another process recovering the same rotation may be compressing it too
+    tmp_path = f"{raw_path}.gz.{os.getpid()}.tmp"
+    try:
+        with open(raw_path, "rb") as source, gzip.open(tmp_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+    except FileNotFoundError:
+        return
+    os.replace(tmp_path, raw_path + ".gz")
+    try:
+        os.remove(raw_path)
+    except FileNotFoundError:
+        pass
+
+def migrate_json_history(legacy_path, path):
+    """Convert an old JSON-array history file into the line-delimited format."""
+    try:
+        with open(legacy_path, "r", encoding="utf-8") as file:
+            entries = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps(entry) + "\n")
+    os.replace(tmp_path, path)
+    return len(entries)
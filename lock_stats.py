@@ -0,0 +1,198 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# ========================
+# Instrumented locks: wait / hold times per lock, thread and call site
+# ========================
+
+# Set LOCK_STATS=0 to get plain threading.Lock objects from make_lock
+ENABLED = os.environ.get("LOCK_STATS", "1") != "0"
+
+# Histogram bucket i counts durations of [2**(i-1), 2**i) nanoseconds
+HISTOGRAM_BUCKETS = 40
+
+_now = time.perf_counter_ns
+_get_ident = threading.get_ident
+_registry_lock = threading.Lock()
+_thread_buffers = []
+_local = threading.local()
+# Samples from threads that have exited, folded together so short-lived
+# threads do not each keep a buffer forever
+EXITED_THREADS = "(exited threads)"
+_exited_stats = {}
+
+def _buffer():
+    """Return this thread's private stats dict, registering it on first use.
+
+    Each thread only ever writes its own dict, so recording a sample takes
+    no lock; readers merge all the dicts when a report is asked for.
+    """
+    try:
+        return _local.stats
+    except AttributeError:
+        stats = _local.stats = {}
+        with _registry_lock:
+            _thread_buffers.append((threading.current_thread(), stats))
+        return stats
+
+class InstrumentedLock:
+    """Drop-in replacement for threading.Lock that records how it is used.
+
+    For every acquisition it records how long the caller waited, how long
+    the lock was then held, which thread held it and the file:line that took
+    it. Samples are folded straight into per-thread counters and log2
+    histograms, so the overhead is a couple of clock reads and dict updates.
+    """
+
+    def __init__(self, name, lock=None):
+        self.name = name
+        self._lock = lock if lock is not None else threading.Lock()
+        self.owner = None
+        self._acquired_at = 0
+        self._wait_ns = 0
+        self._call_site = None
+
+    def acquire(self, blocking=True, timeout=-1):
+        started = _now()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self._started(started, sys._getframe(1))
+        return acquired
+
+    def _started(self, started, frame):
+        self._acquired_at = now = _now()
+        self._wait_ns = now - started
+        self.owner = _get_ident()
+        # Keep the raw code object and line; they are only formatted for reports
+        self._call_site = (frame.f_code, frame.f_lineno)
+
+    def release(self):
+        hold_ns = _now() - self._acquired_at
+        wait_ns, call_site = self._wait_ns, self._call_site
+        self.owner = None
+        self._lock.release()
+        _record(self.name, call_site, wait_ns, hold_ns)
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        started = _now()
+        self._lock.acquire()
+        self._started(started, sys._getframe(1))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def __repr__(self):
+        return f"<InstrumentedLock {self.name} owner={self.owner}>"
+
+def make_lock(name):
+    """Return an InstrumentedLock called ``name``, or a plain Lock when LOCK_STATS=0."""
+    return InstrumentedLock(name) if ENABLED else threading.Lock()
+
+def _record(name, call_site, wait_ns, hold_ns):
+    try:
+        stats = _local.stats
+    except AttributeError:
+        stats = _buffer()
+    entry = stats.get((name, call_site))
+    if entry is None:
+        entry = stats[(name, call_site)] = _empty_totals()
+    entry["count"] += 1
+    entry["wait_ns"] += wait_ns
+    entry["hold_ns"] += hold_ns
+    if wait_ns > entry["max_wait_ns"]:
+        entry["max_wait_ns"] = wait_ns
+    if hold_ns > entry["max_hold_ns"]:
+        entry["max_hold_ns"] = hold_ns
+    entry["wait_histogram"][min(wait_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+    entry["hold_histogram"][min(hold_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+# ========================
+# Reporting
+# ========================
+
+def _merge_into(target, entry):
+    target["count"] += entry["count"]
+    target["wait_ns"] += entry["wait_ns"]
+    target["hold_ns"] += entry["hold_ns"]
+    target["max_wait_ns"] = max(target["max_wait_ns"], entry["max_wait_ns"])
+    target["max_hold_ns"] = max(target["max_hold_ns"], entry["max_hold_ns"])
+    for key in ("wait_histogram", "hold_histogram"):
+        target[key] = [a + b for a, b in zip(target[key], entry[key])]
+
+def _empty_totals():
+    return {
+        "count": 0, "wait_ns": 0, "hold_ns": 0, "max_wait_ns": 0, "max_hold_ns": 0,
+        "wait_histogram": [0] * HISTOGRAM_BUCKETS, "hold_histogram": [0] * HISTOGRAM_BUCKETS,
+    }
+
+def _format_call_site(call_site):
+    code, line = call_site
+    return f"{os.path.basename(code.co_filename)}:{line}"
+
+def _prune_exited_threads():
+    # Caller holds _registry_lock. An exited thread no longer writes its dict,
+    # so it can be merged without racing the owner.
+    global _thread_buffers
+    live = []
+    for thread, stats in _thread_buffers:
+        if thread.is_alive():
+            live.append((thread, stats))
+            continue
+        for key, entry in stats.items():
+            _merge_into(_exited_stats.setdefault(key, _empty_totals()), entry)
+    _thread_buffers = live
+
+def lock_report():
+    """Aggregate every thread's samples into {lock name: totals, call sites, threads}.
+
+    Threads that have exited are reported together as EXITED_THREADS.
+    """
+    with _registry_lock:
+        _prune_exited_threads()
+        buffers = [(thread.name, stats) for thread, stats in _thread_buffers]
+        buffers.append((EXITED_THREADS, {key: dict(entry) for key, entry in _exited_stats.items()}))
+    report = {}
+    for thread_name, stats in buffers:
+        # Copy first: the owning thread may add keys while we read
+        for (name, call_site), entry in list(stats.items()):
+            lock = report.setdefault(name, {"totals": _empty_totals(), "call_sites": {}, "threads": {}})
+            _merge_into(lock["totals"], entry)
+            _merge_into(lock["call_sites"].setdefault(_format_call_site(call_site), _empty_totals()), entry)
+            _merge_into(lock["threads"].setdefault(thread_name, _empty_totals()), entry)
+    return report
+
+def reset_lock_stats():
+    with _registry_lock:
+        _prune_exited_threads()
+        _exited_stats.clear()
+        for _, stats in _thread_buffers:
+            stats.clear()
+
+def format_lock_report(report=None):
+    """Return a short human-readable summary, busiest locks first."""
+    report = lock_report() if report is None else report
+    lines = []
+    for name, lock in sorted(report.items(), key=lambda item: -item[1]["totals"]["wait_ns"]):
+        totals = lock["totals"]
+        count = totals["count"] or 1
+        lines.append(
+            f"{name}: {totals['count']} acquisitions, "
+            f"wait avg {totals['wait_ns'] / count / 1000:.1f} us max {totals['max_wait_ns'] / 1000:.1f} us, "
+            f"hold avg {totals['hold_ns'] / count / 1000:.1f} us max {totals['max_hold_ns'] / 1000:.1f} us"
+        )
+        sites = sorted(lock["call_sites"].items(), key=lambda item: -item[1]["wait_ns"])
+        for call_site, stats in sites[:5]:
+            lines.append(f"    {call_site}: {stats['count']} x, waited {stats['wait_ns'] / 1e6:.2f} ms, "
+                         f"held {stats['hold_ns'] / 1e6:.2f} ms")
+    return "\n".join(lines) if lines else "No lock activity recorded."
+
+def dump_lock_report(path):
+    with open(path, "w") as file:
+        json.dump(lock_report(), file, indent=4)
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+# ========================
+# Parsed-file cache keyed on file identity
+# ========================
+
+# A file changed this recently may be rewritten again within the same
+# timestamp tick (coarse mtimes, or 2 s on FAT), which would leave the
+# signature unchanged. Such reads are served but not cached.
+RACY_WINDOW_NS = 2 * 10**9
+
+def freeze(value):
+    """Return a read-only view of parsed JSON: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def parse_json_lines(file):
+    """Parse a file holding one JSON value per line."""
+    return [json.loads(line) for line in file if line.strip()]
+
+class ParseCache:
+    """Parsed file contents, reused until the file changes.
+
+    ``load`` stats the open file and hands back the previous result when its
+    device, inode, size and modification time all match the last parse, so
+    unchanged files are not parsed again. Atomic replacements (a new inode)
+    and in-place rewrites by any process both change the signature. Results
+    are frozen, since every caller shares the same object.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path, parse=json.load):
+        """Return the frozen result of ``parse(file)`` for ``path``, reusing it while the file is unchanged."""
+        key = (os.path.abspath(path), parse)
+        with open(path, "r", encoding="utf-8") as file:
+            stat = os.fstat(file.fileno())
+            signature = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            with self.lock:
+                cached = self._entries.get(key)
+                if cached is not None and cached[0] == signature:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return cached[1]
+                self.misses += 1
+            value = freeze(parse(file))
+        if time.time_ns() - stat.st_mtime_ns >= RACY_WINDOW_NS:
+            with self.lock:
+                self._entries[key] = (signature, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, path=None):
+        """Forget one file's cached results, or every file's."""
+        with self.lock:
+            if path is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(path)
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+# Shared by the load_* helpers across the project
+default_cache = ParseCache()
+
+def load_json(path):
+    return default_cache.load(path)
+
+def load_json_lines(path):
+    return default_cache.load(path, parse_json_lines)
@@ -1,13 +1,21 @@
+import os
 import tkinter as tk
 from tkinter import messagebox
 import subprocess
 import threading
+from shared_seats import SharedSeatEngine
+
+# Every launched project process maps this file, so they all share one seat map
+SHARED_SEATS_FILE = "seats.shm"
+SHARED_SEATS_ENV = "SEAT_ENGINE_FILE"
+SEATS_FILE = "seats.json"
 
 # Function to run Python script for each number in a separate process
 def run_script_for_number(number):
     try:
         # Use subprocess to run the script in a new process
-        subprocess.Popen(['python', 'final_project.py', str(number)])
+        env = dict(os.environ, **{SHARED_SEATS_ENV: os.path.abspath(SHARED_SEATS_FILE)})
+        subprocess.Popen(['python', 'final_project.py', str(number)], env=env)
         print(f"Script running for project {number}")
     except Exception as e:
         messagebox.showerror("Error", f"Failed to run script for {number}: {e}")
@@ -29,6 +37,12 @@ def on_submit():
         thread = threading.Thread(target=run_script_for_number, args=(number,))
         thread.start()
 
+# Create the shared seat map once, before any project process starts, and
+# release holds left behind by processes of an earlier run
+shared_seats = SharedSeatEngine.open_or_create(SHARED_SEATS_FILE, SEATS_FILE)
+shared_seats.release_held_seats()
+shared_seats.close()
+
 # Setting up the Tkinter window
 root = tk.Tk()
 root.title("Run Projects for Numbers")
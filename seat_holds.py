@@ -0,0 +1,128 @@
+import heapq
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+# ========================
+# Two-phase seat holds with TTL expiry
+# ========================
+
+Hold = namedtuple("Hold", ["token", "user_id", "seat_numbers", "expires_at"])
+
+def held_status(user_id):
+    return f"Held by User {user_id}"
+
+def booked_status(user_id):
+    return f"Booked by User {user_id}"
+
+def process_alive(pid):
+    """True if process ``pid`` may still be running on this machine."""
+    if os.name == "nt":
+        # os.kill would terminate the process there; assume it is alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # It exists but belongs to another user
+    return True
+
+class HoldManager:
+    """Reserve seats first, confirm or release them later.
+
+    ``hold_seat`` atomically moves a seat from "Available" to "Held by User N"
+    and hands back a token. The slow part of a booking (payment, confirmation)
+    then runs without any lock held, and ``confirm_hold`` / ``release_hold``
+    finish it. Holds that are never confirmed are released by a background
+    thread once their TTL runs out.
+    """
+
+    def __init__(self, seat_store, ttl=30.0):
+        self.seat_store = seat_store
+        self.ttl = ttl
+        self.condition = threading.Condition()
+        self._holds = {}
+        self._expiry_heap = []
+        self._closed = False
+        self._reaper = threading.Thread(target=self._expire_loop, name="HoldReaper", daemon=True)
+        self._reaper.start()
+
+    def hold_seat(self, user_id, seat_number, ttl=None):
+        """Return a Hold for the seat, or None if it is not available."""
+        return self.hold_seats(user_id, [seat_number], ttl)
+
+    def hold_seats(self, user_id, seat_numbers, ttl=None):
+        """Hold every listed seat under one token, or none of them.
+
+        Returns None if any of the seats is not available.
+        """
+        seat_numbers = tuple(sorted(set(seat_numbers)))
+        if not self.seat_store.compare_and_set_many(seat_numbers, "Available", held_status(user_id)):
+            return None
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        hold = Hold(uuid.uuid4().hex, user_id, seat_numbers, expires_at)
+        with self.condition:
+            self._holds[hold.token] = hold
+            heapq.heappush(self._expiry_heap, (expires_at, hold.token))
+            # Wake the reaper if this hold now expires first
+            if self._expiry_heap[0][1] == hold.token:
+                self.condition.notify()
+        return hold
+
+    def confirm_hold(self, token):
+        """Turn a live hold into a booking; return False if it expired or is unknown."""
+        hold = self._take(token)
+        if hold is None:
+            return False
+        if hold.expires_at <= time.monotonic():
+            self._release(hold)
+            return False
+        return self.seat_store.compare_and_set_many(
+            hold.seat_numbers, held_status(hold.user_id), booked_status(hold.user_id)
+        )
+
+    def release_hold(self, token):
+        """Give a held seat back; return False if the hold no longer exists."""
+        hold = self._take(token)
+        if hold is None:
+            return False
+        self._release(hold)
+        return True
+
+    def _take(self, token):
+        with self.condition:
+            return self._holds.pop(token, None)
+
+    def _release(self, hold):
+        # The seat may have been cleared by an admin in the meantime, so only
+        # hand seats back that still carry this hold.
+        for seat_number in hold.seat_numbers:
+            self.seat_store.compare_and_set(seat_number, held_status(hold.user_id), "Available")
+
+    def _expire_loop(self):
+        while True:
+            with self.condition:
+                while not self._closed:
+                    if self._expiry_heap:
+                        timeout = self._expiry_heap[0][0] - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    self.condition.wait(timeout)
+                if self._closed:
+                    return
+                _, token = heapq.heappop(self._expiry_heap)
+                # Confirmed or released holds are already gone from _holds
+                hold = self._holds.pop(token, None)
+            if hold is not None:
+                self._release(hold)
+
+    def close(self):
+        with self.condition:
+            self._closed = True
+            self.condition.notify()
+        self._reaper.join()
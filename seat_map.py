@@ -0,0 +1,171 @@
+import json
+import struct
+import sys
+from array import array
+
+# ========================
+# Compact array-backed seat map
+# ========================
+
+# Seat status codes, one byte per seat
+AVAILABLE = 0
+HELD = 1
+BOOKED = 2
+
+STATUS_PREFIXES = {HELD: "Held by User ", BOOKED: "Booked by User "}
+
+# Binary file layout (little-endian):
+#   header: magic, seat count, length of the owner-name table
+#   status: one byte per seat
+#   owners: one signed 64-bit owner id per seat (0 = nobody)
+#   names:  UTF-8 JSON list of owner names, where owner id N is names[N - 1];
+#           empty when owners are plain numeric user ids
+MAGIC = b"SEATMAP1"
+HEADER = struct.Struct("<8sQQ")
+
+def format_status(status, owner):
+    """Turn a status code and owner id into the text used in seats.json."""
+    if status == AVAILABLE:
+        return "Available"
+    return f"{STATUS_PREFIXES[status]}{owner}"
+
+def is_held(text):
+    """True for a "Held by User N" status; holds only live in the memory of the process that made them."""
+    return text.startswith(STATUS_PREFIXES[HELD])
+
+def parse_status(text):
+    """Turn seats.json text such as "Booked by User 3" into (status, owner)."""
+    for status, prefix in STATUS_PREFIXES.items():
+        if text.startswith(prefix):
+            return status, int(text[len(prefix):])
+    if text == "Available":
+        return AVAILABLE, 0
+    raise ValueError(f"Unrecognised seat status: {text!r}")
+
+class SeatMap:
+    """Seat state for very large venues.
+
+    Uses one status byte and one integer owner id per seat, so 100k seats take
+    under 1 MB. Availability checks are O(1) and the free-seat count is kept
+    up to date on every change. Not thread-safe by itself; callers must
+    serialise access with their own lock.
+    """
+
+    def __init__(self, seat_count):
+        self.status = bytearray(seat_count)
+        self.owners = array("q", bytes(8 * seat_count))
+        self.free_count = seat_count
+
+    def __len__(self):
+        return len(self.status)
+
+    def is_available(self, seat_number):
+        return self.status[seat_number] == AVAILABLE
+
+    def get(self, seat_number):
+        """Return (status, owner) for a seat."""
+        return self.status[seat_number], self.owners[seat_number]
+
+    def set(self, seat_number, status, owner=0):
+        was_free = self.status[seat_number] == AVAILABLE
+        self.status[seat_number] = status
+        self.owners[seat_number] = owner if status != AVAILABLE else 0
+        self.free_count += (status == AVAILABLE) - was_free
+
+    def claim(self, seat_number, owner, status=BOOKED):
+        """Take an available seat for ``owner``; return False if it is not free."""
+        if self.status[seat_number] != AVAILABLE:
+            return False
+        self.set(seat_number, status, owner)
+        return True
+
+    def release(self, seat_number):
+        self.set(seat_number, AVAILABLE)
+
+    def count_free(self):
+        return self.free_count
+
+    def free_seats(self):
+        """Yield the numbers of all available seats."""
+        status = self.status
+        seat_number = status.find(AVAILABLE)
+        while seat_number != -1:
+            yield seat_number
+            seat_number = status.find(AVAILABLE, seat_number + 1)
+
+    def status_text(self, seat_number):
+        return format_status(*self.get(seat_number))
+
+    # Binary persistence
+    def save(self, path, owner_names=None):
+        names = json.dumps(owner_names).encode("utf-8") if owner_names else b""
+        owners = array("q", self.owners)
+        if sys.byteorder == "big":
+            owners.byteswap()
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(self), len(names)))
+            file.write(self.status)
+            file.write(owners.tobytes())
+            file.write(names)
+
+    @classmethod
+    def load(cls, path):
+        """Read a binary seat map; return (seat_map, owner_names or None)."""
+        with open(path, "rb") as file:
+            magic, seat_count, names_length = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a seat map file")
+            seat_map = cls.__new__(cls)
+            seat_map.status = bytearray(file.read(seat_count))
+            seat_map.owners = array("q")
+            seat_map.owners.frombytes(file.read(8 * seat_count))
+            if sys.byteorder == "big":
+                seat_map.owners.byteswap()
+            names = file.read(names_length)
+        seat_map.free_count = seat_map.status.count(AVAILABLE)
+        return seat_map, json.loads(names) if names else None
+
+    # Conversion from the JSON formats used by the front ends
+    @classmethod
+    def from_seat_list(cls, seats):
+        """Build a map from final_project's list of status strings."""
+        seat_map = cls(len(seats))
+        for seat_number, text in enumerate(seats):
+            status, owner = parse_status(text)
+            if status != AVAILABLE:
+                seat_map.set(seat_number, status, owner)
+        return seat_map
+
+    @classmethod
+    def from_seat_dict(cls, seat_data):
+        """Build a map from hany_project's {"seats": {"seat_1": name}} data.
+
+        Returns (seat_map, owner_names); owner id N refers to owner_names[N - 1].
+        """
+        seats = seat_data["seats"]
+        seat_map = cls(len(seats))
+        owner_ids = {}
+        for seat_id, name in seats.items():
+            if name == "available":
+                continue
+            if name not in owner_ids:
+                owner_ids[name] = len(owner_ids) + 1
+            seat_map.set(int(seat_id.split("_")[1]) - 1, BOOKED, owner_ids[name])
+        return seat_map, list(owner_ids)
+
+def convert_json_file(json_path, map_path):
+    """Convert either JSON seat file format to the binary seat map format."""
+    with open(json_path, "r") as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        seat_map, owner_names = SeatMap.from_seat_dict(data)
+    else:
+        seat_map, owner_names = SeatMap.from_seat_list(data), None
+    seat_map.save(map_path, owner_names)
+    return seat_map
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python seat_map.py SEATS_JSON SEAT_MAP_FILE")
+    converted = convert_json_file(sys.argv[1], sys.argv[2])
+    print(f"Converted {len(converted)} seats ({converted.count_free()} free) to {sys.argv[2]}")
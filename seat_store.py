@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+from change_feed import ChangeFeed
+from lock_stats import make_lock
+from seat_map import is_held
+
+# ========================
+# In-memory seat store with write-behind persistence
+# ========================
+
+class SeatStore:
+    """Authoritative in-memory copy of seats.json.
+
+    Reads and writes only touch memory. A background flusher writes the whole
+    list back to disk once per flush window (every ``flush_interval`` seconds,
+    or sooner once ``flush_threshold`` updates are pending), so a burst of
+    bookings costs a single file write.
+
+    Every change is published on ``self.changes`` with a new version, and the
+    flusher also reloads the file when another process has rewritten it, so
+    ``changes_since`` reports outside bookings too.
+
+    Held seats are written to disk as "Available": a hold belongs to the
+    HoldManager of this process and would never be confirmed or released
+    after a restart. Holds found in an older file are released on load.
+    """
+
+    def __init__(self, path, flush_interval=1.0, flush_threshold=50):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.lock = make_lock("SeatStore.lock")
+        self._write_lock = threading.Lock()
+        self.changes = ChangeFeed()
+        with open(path, "r") as file:
+            self._seats = json.load(file)
+        self._file_signature = self._stat_signature()
+        self._dirty = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.release_held_seats()
+        self._flusher = threading.Thread(target=self._flush_loop, name="SeatStoreFlusher", daemon=True)
+        self._flusher.start()
+
+    def __len__(self):
+        with self.lock:
+            return len(self._seats)
+
+    def get(self, seat_number):
+        with self.lock:
+            return self._seats[seat_number]
+
+    def snapshot(self):
+        """Return a copy of the current seat list."""
+        with self.lock:
+            return list(self._seats)
+
+    def changes_since(self, version):
+        """Return ``(version, {seat_number: status})`` for seats changed after ``version``.
+
+        Falls back to every seat when ``version`` is too old for the change feed.
+        """
+        with self.lock:
+            current, changes = self.changes.changes_since(version)
+            if changes is None:
+                changes = dict(enumerate(self._seats))
+            return current, changes
+
+    def set(self, seat_number, status):
+        with self.lock:
+            self._seats[seat_number] = status
+            self._changed({seat_number: status})
+
+    def set_all(self, seats):
+        with self.lock:
+            self._replace(list(seats))
+            self._mark_dirty()
+
+    def compare_and_set(self, seat_number, expected, status):
+        """Set a seat only if it still holds ``expected``; return True on success."""
+        with self.lock:
+            if self._seats[seat_number] != expected:
+                return False
+            self._seats[seat_number] = status
+            self._changed({seat_number: status})
+            return True
+
+    def compare_and_set_many(self, seat_numbers, expected, status):
+        """Set every listed seat only if all of them still hold ``expected``.
+
+        Either all seats change or none do; returns True on success.
+        """
+        with self.lock:
+            if any(self._seats[seat_number] != expected for seat_number in seat_numbers):
+                return False
+            for seat_number in seat_numbers:
+                self._seats[seat_number] = status
+            self._changed({seat_number: status for seat_number in seat_numbers})
+            return True
+
+    def release_held_seats(self):
+        """Make every held seat available again; return how many were released."""
+        with self.lock:
+            released = {seat_number: "Available" for seat_number, status in enumerate(self._seats) if is_held(status)}
+            for seat_number in released:
+                self._seats[seat_number] = "Available"
+            self._changed(released)
+            return len(released)
+
+    # The helpers below expect the caller to hold self.lock
+    def _changed(self, changes):
+        self.changes.publish(changes)
+        self._mark_dirty(len(changes))
+
+    def _replace(self, seats):
+        changes = {
+            seat_number: status for seat_number, status in enumerate(seats)
+            if seat_number >= len(self._seats) or self._seats[seat_number] != status
+        }
+        self._seats = seats
+        self.changes.publish(changes)
+
+    def _mark_dirty(self, count=None):
+        self._dirty += len(self._seats) if count is None else count
+        if self._dirty >= self.flush_threshold:
+            self._wakeup.set()
+
+    # Persistence
+    def flush(self):
+        """Write pending changes to disk; a no-op when nothing is dirty."""
+        with self._write_lock:
+            with self.lock:
+                if not self._dirty:
+                    return
+                seats = ["Available" if is_held(status) else status for status in self._seats]
+                self._dirty = 0
+            # Write to a temporary file first so a crash never leaves a torn seats.json
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(seats, file, indent=4)
+            os.replace(tmp_path, self.path)
+            self._file_signature = self._stat_signature()
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def reload_if_changed(self):
+        """Pick up a seats.json written by another process; return True if it was reloaded.
+
+        Skipped while local changes are pending, since the next flush will
+        overwrite the file anyway.
+        """
+        with self._write_lock:
+            signature = self._stat_signature()
+            if signature is None or signature == self._file_signature:
+                return False
+            try:
+                with open(self.path, "r") as file:
+                    seats = json.load(file)
+            except json.JSONDecodeError:
+                return False
+            with self.lock:
+                if self._dirty:
+                    return False
+                self._replace(seats)
+            self._file_signature = signature
+            return True
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            self.reload_if_changed()
+
+    def close(self):
+        """Stop the flusher and write out anything still pending."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        self.flush()
@@ -0,0 +1,266 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+
+from change_feed import ChangeFeed
+from seat_map import AVAILABLE, HELD, HEADER as MAP_HEADER, MAGIC as MAP_MAGIC, SeatMap, parse_status
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ========================
+# Seat engine shared by several processes through an mmap'd file
+# ========================
+
+# File layout: a seat_map.py SeatMap file with an empty owner-name table,
+# so SeatMap.load reads it like any other, followed at the next 8-byte
+# boundary by the state the processes share (little-endian):
+#   header: magic, free-seat count, change counter, ring size
+#   ring:   the seat number of change n is in slot n % ring size
+SHARED_MAGIC = b"SEATSHR1"
+SHARED_HEADER = struct.Struct("<8sQQQ")
+COUNTER = struct.Struct("<Q")
+RING_SLOTS = 65536
+
+def _shared_offset(seat_count):
+    return (MAP_HEADER.size + 9 * seat_count + 7) // 8 * 8
+
+class _MappedSeatMap(SeatMap):
+    """SeatMap whose status bytes, owners and free-seat counter live in the mapped file."""
+
+    def __init__(self, mapped, view, seat_count):
+        self._mmap = mapped
+        self.status = view[MAP_HEADER.size:MAP_HEADER.size + seat_count]
+        owners_offset = MAP_HEADER.size + seat_count
+        self.owners = view[owners_offset:owners_offset + 8 * seat_count].cast("q")
+        self._free_offset = _shared_offset(seat_count) + 8
+
+    @property
+    def free_count(self):
+        return COUNTER.unpack_from(self._mmap, self._free_offset)[0]
+
+    @free_count.setter
+    def free_count(self, value):
+        COUNTER.pack_into(self._mmap, self._free_offset, value)
+
+    def _find(self, status, start=0):
+        position = self._mmap.find(bytes([status]), MAP_HEADER.size + start, MAP_HEADER.size + len(self))
+        return position - MAP_HEADER.size if position != -1 else -1
+
+    def free_seats(self):
+        seat_number = self._find(AVAILABLE)
+        while seat_number != -1:
+            yield seat_number
+            seat_number = self._find(AVAILABLE, seat_number + 1)
+
+    def held_seats(self):
+        seat_number = self._find(HELD)
+        while seat_number != -1:
+            yield seat_number
+            seat_number = self._find(HELD, seat_number + 1)
+
+    def close(self):
+        self.status.release()
+        self.owners.release()
+
+class SharedSeatEngine:
+    """Seat state that every process on the machine sees and changes directly.
+
+    The seat map lives in a memory-mapped file, so reads and writes run at
+    memory speed, and every change happens under an exclusive file lock, so a
+    seat can only ever be claimed by one process. It offers the same methods
+    as SeatStore and can be used in its place.
+
+    The file is a SeatMap, so the free-seat count is kept up to date as seats
+    change. Every change also appends its seat number to a ring in the file,
+    and ``changes_since`` reads only the ring slots written since this
+    process last looked, so a refresh costs time proportional to what
+    changed. A process that falls more than a ring behind resynchronises
+    from a snapshot.
+
+    runner.py launches unrelated processes, so a named file is used rather
+    than multiprocessing.shared_memory, which would need a parent to own it.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("shared seat files use SeatMap's little-endian layout")
+        self.path = path
+        self.lock = threading.Lock()
+        self.changes = ChangeFeed()
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, self.seat_count, names_length = MAP_HEADER.unpack_from(self._mmap, 0)
+        shared_offset = _shared_offset(self.seat_count)
+        if (magic != MAP_MAGIC or names_length or len(self._mmap) < shared_offset + SHARED_HEADER.size
+                or SHARED_HEADER.unpack_from(self._mmap, shared_offset)[0] != SHARED_MAGIC):
+            raise ValueError(f"{path} is not a shared seat file")
+        self._changes_offset = shared_offset + 16
+        self._ring_slots = SHARED_HEADER.unpack_from(self._mmap, shared_offset)[3]
+        self._view = memoryview(self._mmap)
+        self._map = _MappedSeatMap(self._mmap, self._view, self.seat_count)
+        ring_offset = shared_offset + SHARED_HEADER.size
+        self._ring = self._view[ring_offset:ring_offset + 8 * self._ring_slots].cast("Q")
+        self._sync_lock = threading.Lock()
+        self._seen_changes = None
+
+    @classmethod
+    def create(cls, path, seats, ring_slots=RING_SLOTS):
+        """Write a new shared seat file holding ``seats`` (seats.json strings)."""
+        seat_map = SeatMap.from_seat_list(seats)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        seat_map.save(tmp_path)
+        with open(tmp_path, "ab") as file:
+            file.write(bytes(_shared_offset(len(seat_map)) - file.tell()))
+            file.write(SHARED_HEADER.pack(SHARED_MAGIC, seat_map.count_free(), 0, ring_slots))
+            file.write(bytes(8 * ring_slots))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open_or_create(cls, path, seats_json, seat_count=10):
+        """Open ``path``, first creating it from the seats.json file if needed.
+
+        Starts with ``seat_count`` available seats when seats.json is missing too.
+        """
+        if not os.path.exists(path):
+            try:
+                with open(seats_json, "r") as file:
+                    seats = json.load(file)
+            except FileNotFoundError:
+                seats = ["Available" for _ in range(seat_count)]
+            cls.create(path, seats)
+        return cls(path)
+
+    @contextmanager
+    def _exclusive(self):
+        # The thread lock keeps threads of this process apart; the file lock
+        # keeps processes apart.
+        with self.lock:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    # The helpers below expect the caller to hold _exclusive()
+    def _change_count(self):
+        return COUNTER.unpack_from(self._mmap, self._changes_offset)[0]
+
+    def _write(self, seat_numbers, text):
+        status, owner = parse_status(text)
+        for seat_number in seat_numbers:
+            self._map.set(seat_number, status, owner)
+        self._record_changes(seat_numbers)
+
+    def _record_changes(self, seat_numbers):
+        changes = self._change_count()
+        if len(seat_numbers) > self._ring_slots:
+            # More than the ring holds: every reader resynchronises
+            changes += self._ring_slots + 1
+        else:
+            for seat_number in seat_numbers:
+                self._ring[changes % self._ring_slots] = seat_number
+                changes += 1
+        COUNTER.pack_into(self._mmap, self._changes_offset, changes)
+
+    # SeatStore interface
+    def __len__(self):
+        return self.seat_count
+
+    def get(self, seat_number):
+        if not 0 <= seat_number < self.seat_count:
+            raise IndexError("seat number out of range")
+        with self._exclusive():
+            return self._map.status_text(seat_number)
+
+    def snapshot(self):
+        with self._exclusive():
+            return [self._map.status_text(seat_number) for seat_number in range(self.seat_count)]
+
+    def set(self, seat_number, status):
+        with self._exclusive():
+            self._write([seat_number], status)
+
+    def set_all(self, seats):
+        with self._exclusive():
+            seats = seats[:self.seat_count]
+            for seat_number, text in enumerate(seats):
+                self._map.set(seat_number, *parse_status(text))
+            self._record_changes(range(len(seats)))
+
+    def compare_and_set(self, seat_number, expected, status):
+        return self.compare_and_set_many([seat_number], expected, status)
+
+    def compare_and_set_many(self, seat_numbers, expected, status):
+        expected_code = parse_status(expected)
+        with self._exclusive():
+            for seat_number in seat_numbers:
+                if self._map.get(seat_number) != expected_code:
+                    return False
+            self._write(seat_numbers, status)
+            return True
+
+    def release_held_seats(self):
+        """Make every held seat available again; return how many were released.
+
+        Holds belong to the process that made them, so runner.py calls this
+        before starting any process: holds left by processes that exited
+        would otherwise block their seats forever.
+        """
+        with self._exclusive():
+            held = list(self._map.held_seats())
+            if held:
+                self._write(held, "Available")
+            return len(held)
+
+    def count_free(self):
+        with self._exclusive():
+            return self._map.count_free()
+
+    def changes_since(self, version):
+        """Same contract as SeatStore.changes_since, including other processes' changes."""
+        with self._sync_lock:
+            with self._exclusive():
+                changes = self._change_count()
+                if changes != self._seen_changes:
+                    if self._seen_changes is None or changes - self._seen_changes > self._ring_slots:
+                        seat_numbers = range(self.seat_count)
+                    else:
+                        seat_numbers = {self._ring[change % self._ring_slots]
+                                        for change in range(self._seen_changes, changes)}
+                    updates = {seat_number: self._map.status_text(seat_number) for seat_number in seat_numbers}
+            if changes != self._seen_changes:
+                self._seen_changes = changes
+                self.changes.publish(updates)
+            current, updates = self.changes.changes_since(version)
+            if updates is None:
+                updates = dict(enumerate(self.snapshot()))
+            return current, updates
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        self.flush()
+        self._map.close()
+        self._ring.release()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,508 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from change_feed import ChangeFeed
+from history_log import HistoryLog, apply_history_entry
+from seat_holds import process_alive
+from seat_map import is_held
+
+# ========================
+# SQLite storage backend (WAL mode)
+# ========================
+#
+# Backends are duck-typed, the same way SharedSeatEngine stands in for
+# SeatStore:
+#   seats    SeatStore interface: __len__, get, snapshot, changes_since, set,
+#            set_all, compare_and_set, compare_and_set_many, flush, close
+#   history  HistoryLog interface: append, append_many, iter_entries, count,
+#            read_page, read_entries, reconstruct_state, rotate, close, plus
+#            HistoryIndex's entries_for_* / entries_between queries
+#   users    crud's user backend: load(), prepare(users, next_id, changed_ids)
+#            under the table lock, then write(payload) outside it, and
+#            optionally read_page(after_id, limit) for paging without load()
+#
+# Every mutation is a short transaction that touches only the rows it
+# changes. In WAL mode readers keep reading the last committed state while a
+# writer commits, and a crash never leaves a half-written file behind.
+#
+# Import existing JSON data with:
+#   python sqlite_store.py bookings.db
+# then set BOOKING_DB=bookings.db to have final_project.py and crud.py use it.
+
+DATABASE_ENV = "BOOKING_DB"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS seats (
+    seat_number INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS seats_version ON seats (version);
+CREATE TABLE IF NOT EXISTS seat_holders (seat_number INTEGER PRIMARY KEY, pid INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS history (
+    entry_number INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    seat_number INTEGER,
+    action TEXT,
+    start_time TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_user ON history (user_id);
+CREATE INDEX IF NOT EXISTS history_seat ON history (seat_number);
+CREATE INDEX IF NOT EXISTS history_action ON history (action);
+CREATE INDEX IF NOT EXISTS history_start_time ON history (start_time);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email TEXT,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+INSERT OR IGNORE INTO meta VALUES ('seats_version', 0);
+INSERT OR IGNORE INTO meta VALUES ('history_base', 0);
+INSERT OR IGNORE INTO meta VALUES ('history_snapshot', '{}');
+INSERT OR IGNORE INTO meta VALUES ('users_next_id', 1);
+"""
+
+class SQLiteDatabase:
+    """One SQLite file shared by the seat, history and user backends.
+
+    Each thread gets its own connection, opened on first use and reused
+    after that. ``transaction()`` starts with BEGIN IMMEDIATE, so writers
+    queue on SQLite's write lock up front instead of failing halfway.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        """Return this thread's connection."""
+        try:
+            return self._local.connection
+        except AttributeError:
+            pass
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self._local.connection = connection
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get_meta(self, key, connection=None):
+        connection = connection or self.connection()
+        return connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def set_meta(self, connection, key, value):
+        connection.execute("UPDATE meta SET value = ? WHERE key = ?", (value, key))
+
+    def close(self):
+        """Close every thread's connection."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+# ========================
+# Seats
+# ========================
+
+class SQLiteSeatStore:
+    """SeatStore interface over the ``seats`` table.
+
+    Every write bumps ``seats_version`` in the same transaction and stamps the
+    rows it changed with it, so ``changes_since`` only reads seats changed
+    after the version this process last saw, whichever process wrote them.
+
+    ``seat_holders`` records which process put each seat on hold, so
+    ``release_held_seats`` can tell abandoned holds from ones another live
+    process is still confirming.
+    """
+
+    def __init__(self, database, seat_count=10):
+        self.database = database
+        self.changes = ChangeFeed()
+        self._sync_lock = threading.Lock()
+        with database.transaction() as connection:
+            if not connection.execute("SELECT COUNT(*) FROM seats").fetchone()[0]:
+                connection.executemany("INSERT INTO seats (seat_number, status) VALUES (?, 'Available')",
+                                       [(seat_number,) for seat_number in range(seat_count)])
+        self._seen_version = None
+
+    def _bump_version(self, connection):
+        connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'seats_version'")
+        return self.database.get_meta("seats_version", connection)
+
+    def __len__(self):
+        return self.database.connection().execute("SELECT COUNT(*) FROM seats").fetchone()[0]
+
+    def get(self, seat_number):
+        row = self.database.connection().execute(
+            "SELECT status FROM seats WHERE seat_number = ?", (seat_number,)).fetchone()
+        if row is None:
+            raise IndexError("seat number out of range")
+        return row[0]
+
+    def snapshot(self):
+        rows = self.database.connection().execute("SELECT status FROM seats ORDER BY seat_number")
+        return [status for status, in rows]
+
+    def _record_holders(self, connection, seat_numbers, held):
+        if held:
+            connection.executemany("INSERT OR REPLACE INTO seat_holders VALUES (?, ?)",
+                                   [(seat_number, os.getpid()) for seat_number in seat_numbers])
+        else:
+            connection.executemany("DELETE FROM seat_holders WHERE seat_number = ?",
+                                   [(seat_number,) for seat_number in seat_numbers])
+
+    def set(self, seat_number, status):
+        with self.database.transaction() as connection:
+            version = self._bump_version(connection)
+            connection.execute("UPDATE seats SET status = ?, version = ? WHERE seat_number = ?",
+                               (status, version, seat_number))
+            self._record_holders(connection, [seat_number], is_held(status))
+
+    def set_all(self, seats):
+        with self.database.transaction() as connection:
+            version = self._bump_version(connection)
+            connection.executemany(
+                "INSERT INTO seats VALUES (?, ?, ?) ON CONFLICT (seat_number) DO UPDATE "
+                "SET status = excluded.status, version = excluded.version WHERE status != excluded.status",
+                [(seat_number, status, version) for seat_number, status in enumerate(seats)])
+            connection.execute("DELETE FROM seats WHERE seat_number >= ?", (len(seats),))
+            # Seats still held keep their holder; the rest have none
+            self._record_holders(connection, [seat_number for seat_number, status in enumerate(seats)
+                                              if not is_held(status)], False)
+            connection.executemany("INSERT OR IGNORE INTO seat_holders VALUES (?, ?)",
+                                   [(seat_number, os.getpid()) for seat_number, status in enumerate(seats)
+                                    if is_held(status)])
+
+    def compare_and_set(self, seat_number, expected, status):
+        return self.compare_and_set_many([seat_number], expected, status)
+
+    def release_held_seats(self):
+        """Make seats held by exited processes available again; return how many were released.
+
+        Holds belong to the process that made them, so a hold whose process is
+        gone would never be confirmed or released. Holds of processes that are
+        still running are left alone.
+        """
+        with self.database.transaction() as connection:
+            rows = connection.execute(
+                "SELECT seats.seat_number, seat_holders.pid FROM seats LEFT JOIN seat_holders "
+                "USING (seat_number) WHERE seats.status LIKE 'Held by User %'").fetchall()
+            abandoned = [(seat_number,) for seat_number, pid in rows if pid is None or not process_alive(pid)]
+            if not abandoned:
+                return 0
+            version = self._bump_version(connection)
+            connection.executemany("UPDATE seats SET status = 'Available', version = ? WHERE seat_number = ?",
+                                   [(version, seat_number) for seat_number, in abandoned])
+            connection.executemany("DELETE FROM seat_holders WHERE seat_number = ?", abandoned)
+            return len(abandoned)
+
+    def compare_and_set_many(self, seat_numbers, expected, status):
+        """Claim every listed seat in one transaction, only if all still hold ``expected``."""
+        seat_numbers = sorted(set(seat_numbers))
+        placeholders = ",".join("?" * len(seat_numbers))
+        with self.database.transaction() as connection:
+            matching = connection.execute(
+                f"SELECT COUNT(*) FROM seats WHERE status = ? AND seat_number IN ({placeholders})",
+                [expected] + seat_numbers).fetchone()[0]
+            if matching != len(seat_numbers):
+                return False
+            version = self._bump_version(connection)
+            connection.executemany("UPDATE seats SET status = ?, version = ? WHERE seat_number = ?",
+                                   [(status, version, seat_number) for seat_number in seat_numbers])
+            self._record_holders(connection, seat_numbers, is_held(status))
+            return True
+
+    def changes_since(self, version):
+        """Same contract as SeatStore.changes_since, including other processes' changes."""
+        with self._sync_lock:
+            connection = self.database.connection()
+            shared_version = self.database.get_meta("seats_version")
+            if shared_version != self._seen_version:
+                if self._seen_version is None:
+                    rows = connection.execute("SELECT seat_number, status FROM seats")
+                else:
+                    rows = connection.execute("SELECT seat_number, status FROM seats WHERE version > ?",
+                                              (self._seen_version,))
+                self.changes.publish(dict(rows.fetchall()))
+                self._seen_version = shared_version
+            current, changes = self.changes.changes_since(version)
+            if changes is None:
+                changes = dict(enumerate(self.snapshot()))
+            return current, changes
+
+    def flush(self):
+        pass  # every change is committed as it is made
+
+    def close(self):
+        pass  # the database owns the connections
+
+# ========================
+# History
+# ========================
+
+class SQLiteHistoryLog:
+    """HistoryLog interface over the ``history`` table.
+
+    Entry numbers are the table's AUTOINCREMENT ids, which stay contiguous
+    because writers are serialised: entry ``n`` of the whole history is row
+    ``n + 1``, and entry ``n`` of the active segment is row
+    ``history_base + n + 1``, so paging is a primary-key range scan.
+    ``rotate()`` only records the seat state the rows so far lead to and
+    moves ``history_base`` past them, like HistoryLog's snapshot file; the
+    rows themselves stay where they are, indexed. The per-user, per-seat,
+    per-action and time queries use the table's SQL indexes and cover the
+    whole history.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.path = database.path
+
+    @property
+    def base_count(self):
+        return self.database.get_meta("history_base")
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        with self.database.transaction() as connection:
+            connection.executemany(
+                "INSERT INTO history (user_id, seat_number, action, start_time, entry) VALUES (?, ?, ?, ?, ?)",
+                [(entry.get("user_id"), entry.get("seat_number"), entry.get("action"),
+                  entry.get("start_time"), json.dumps(entry)) for entry in entries])
+
+    def _query(self, sql, parameters=()):
+        return [json.loads(entry) for entry, in self.database.connection().execute(sql, parameters)]
+
+    def iter_entries(self):
+        # A separate cursor, so the rows stream instead of being fetched at once
+        rows = self.database.connection().execute(
+            "SELECT entry FROM history WHERE entry_number > ? ORDER BY entry_number", (self.base_count,))
+        for entry, in rows:
+            yield json.loads(entry)
+
+    def __iter__(self):
+        return self.iter_entries()
+
+    def count(self, include_archived=False):
+        connection = self.database.connection()
+        last, base = connection.execute(
+            "SELECT MAX(entry_number), (SELECT value FROM meta WHERE key = 'history_base') FROM history").fetchone()
+        total = last or 0
+        return total if include_archived else max(total - base, 0)
+
+    def read_page(self, start, limit, include_archived=False):
+        """Return up to ``limit`` entries, starting with entry number ``start``."""
+        first = (0 if include_archived else self.base_count) + max(start, 0) + 1
+        return self._query("SELECT entry FROM history WHERE entry_number >= ? ORDER BY entry_number LIMIT ?",
+                           (first, limit))
+
+    def read_entries(self, entry_numbers, include_archived=False):
+        base = (0 if include_archived else self.base_count) + 1
+        entries = {}
+        numbers = list(entry_numbers)
+        for position in range(0, len(numbers), 500):
+            chunk = [base + number for number in numbers[position:position + 500]]
+            rows = self.database.connection().execute(
+                f"SELECT entry_number, entry FROM history WHERE entry_number IN ({','.join('?' * len(chunk))})", chunk)
+            entries.update((number - base, json.loads(entry)) for number, entry in rows)
+        return [entries[number] for number in numbers]
+
+    # HistoryIndex queries
+    def entries_for_user(self, user_id):
+        return self._query("SELECT entry FROM history WHERE user_id = ? ORDER BY entry_number", (user_id,))
+
+    def entries_for_seat(self, seat_number):
+        return self._query("SELECT entry FROM history WHERE seat_number = ? ORDER BY entry_number", (seat_number,))
+
+    def entries_for_action(self, action):
+        return self._query("SELECT entry FROM history WHERE action = ? ORDER BY entry_number", (action,))
+
+    def entries_between(self, start_time, end_time):
+        return self._query("SELECT entry FROM history WHERE start_time >= ? AND start_time < ? "
+                           "ORDER BY entry_number", (start_time, end_time))
+
+    # Snapshots and rotation
+    def _replay_active(self, connection):
+        """Return (state after the active entries, number of the last row); caller is in a transaction."""
+        state = json.loads(self.database.get_meta("history_snapshot", connection))
+        last = None
+        rows = connection.execute("SELECT entry_number, entry FROM history WHERE entry_number > ? "
+                                  "ORDER BY entry_number", (self.database.get_meta("history_base", connection),))
+        for last, entry in rows:
+            apply_history_entry(state, json.loads(entry))
+        return state, last
+
+    def reconstruct_state(self):
+        """Return {seat_number: status} for booked seats, replaying only the active segment."""
+        connection = self.database.connection()
+        # One read transaction, so the snapshot and the rows agree
+        connection.execute("BEGIN")
+        try:
+            return self._replay_active(connection)[0]
+        finally:
+            connection.execute("COMMIT")
+
+    def rotate(self):
+        """Snapshot the state the active entries lead to and start a new segment after them."""
+        with self.database.transaction() as connection:
+            state, last = self._replay_active(connection)
+            if last is None:
+                return
+            self.database.set_meta(connection, "history_snapshot", json.dumps(state))
+            self.database.set_meta(connection, "history_base", last)
+
+    def iter_archived_entries(self, start=0):
+        """Yield entries before the active segment from entry number ``start`` on, oldest first."""
+        rows = self.database.connection().execute(
+            "SELECT entry FROM history WHERE entry_number > ? AND entry_number <= ? ORDER BY entry_number",
+            (start, self.base_count))
+        for entry, in rows:
+            yield json.loads(entry)
+
+    def close(self):
+        pass  # the database owns the connections
+
+# ========================
+# Users
+# ========================
+
+class SQLiteUserBackend:
+    """crud.UserTable backend that writes only the users changed in each batch."""
+
+    def __init__(self, database):
+        self.database = database
+
+    def load(self):
+        rows = self.database.connection().execute("SELECT data FROM users ORDER BY id")
+        return {
+            "users": [json.loads(data) for data, in rows],
+            "next_id": self.database.get_meta("users_next_id"),
+        }
+
+    def read_page(self, after_id, limit):
+        """Return up to ``limit`` users with ids above ``after_id``, straight from the table."""
+        rows = self.database.connection().execute(
+            "SELECT data FROM users WHERE id > ? ORDER BY id LIMIT ?", (-1 if after_id is None else after_id, limit))
+        return [json.loads(data) for data, in rows]
+
+    def prepare(self, users, next_id, changed_ids):
+        # Caller holds crud.lock; deleted users come back as None
+        changed = {user_id: users.get(user_id) for user_id in changed_ids}
+        return {user_id: None if user is None else dict(user) for user_id, user in changed.items()}, next_id
+
+    def write(self, payload):
+        changed, next_id = payload
+        with self.database.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+                [(user_id, user.get("email"), user.get("name"), json.dumps(user))
+                 for user_id, user in changed.items() if user is not None])
+            connection.executemany("DELETE FROM users WHERE id = ?",
+                                   [(user_id,) for user_id, user in changed.items() if user is None])
+            self.database.set_meta(connection, "users_next_id", next_id)
+
+# ========================
+# Importing the JSON files
+# ========================
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+
+def import_json_data(database, seats_file="seats.json", history_file="booking_history.jsonl",
+                     legacy_history_file="booking_history.json", users_file="users.json"):
+    """Replace the database's seats, history and users with the contents of the JSON files.
+
+    The history includes the segments HistoryLog has archived, and its
+    snapshot becomes the database's, so ``reconstruct_state`` gives the same
+    answer. Missing files are skipped. Returns the number of rows imported
+    per table.
+    """
+    counts = {}
+    seats = _read_json(seats_file, None)
+    # hany_project keeps {"seats": {...}} in a file of the same name; only the list format is ours
+    if isinstance(seats, list):
+        SQLiteSeatStore(database, seat_count=0).set_all(seats)
+        counts["seats"] = len(seats)
+
+    base_count, snapshot_state = 0, {}
+    if os.path.exists(history_file) or os.path.exists(history_file + ".snapshot"):
+        history_log = HistoryLog(history_file)
+        try:
+            entries = list(history_log.iter_archived_entries())
+            base_count, snapshot_state = history_log.base_count, history_log.snapshot["state"]
+            if len(entries) != base_count:
+                raise ValueError(f"{history_log.archive_dir} holds {len(entries)} archived entries, "
+                                 f"but the snapshot expects {base_count}; refusing a partial import")
+            entries.extend(history_log.iter_entries())
+        finally:
+            history_log.close()
+    else:
+        entries = _read_json(legacy_history_file, [])
+    with database.transaction() as connection:
+        connection.execute("DELETE FROM history")
+        connection.execute("DELETE FROM sqlite_sequence WHERE name = 'history'")
+        database.set_meta(connection, "history_base", 0)
+        database.set_meta(connection, "history_snapshot", "{}")
+    SQLiteHistoryLog(database).append_many(entries)
+    with database.transaction() as connection:
+        database.set_meta(connection, "history_base", base_count)
+        database.set_meta(connection, "history_snapshot", json.dumps(snapshot_state))
+    counts["history"] = len(entries)
+
+    data = _read_json(users_file, None)
+    if data is not None:
+        users = {}
+        next_id = max([data.get("next_id", 1)] + [user.get("id", 0) + 1 for user in data["users"]])
+        for user in data["users"]:
+            # Older files can repeat an id; give the repeat a fresh one, as crud does
+            if user.get("id") in users:
+                user = dict(user, id=next_id)
+                next_id += 1
+            users[user["id"]] = user
+        with database.transaction() as connection:
+            connection.execute("DELETE FROM users")
+        backend = SQLiteUserBackend(database)
+        backend.write(backend.prepare(users, next_id, list(users)))
+        counts["users"] = len(users)
+    return counts
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python sqlite_store.py DATABASE")
+    database = SQLiteDatabase(sys.argv[1])
+    for table_name, count in import_json_data(database).items():
+        print(f"Imported {count} {table_name} rows into {sys.argv[1]}")
+    database.close()
@@ -27,9 +27,14 @@ def save_seat_data(data):
 # ========================
 # Thread-safe Seat Booking System
 # ========================
+@st.cache_resource
+def get_booking_lock():
+    """One lock for every session; a per-rerun lock would let sessions double-book."""
+    return threading.Lock()
+
 class SeatBookingSystem:
     def __init__(self):
-        self.lock = threading.Lock()
+        self.lock = get_booking_lock()
         self.thread_activity = []  # List to store thread activities
 
     def log_thread_activity(self, activity):
@@ -0,0 +1,131 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from parse_cache import load_json_lines
+
+# ========================
+# Thread activity events, buffered per thread and flushed in batches
+# ========================
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class ThreadActivityLog:
+    """Append-only JSON lines log of thread start / end events.
+
+    ``record`` only appends a tuple to the calling thread's own deque, which
+    needs no lock, so it costs about a microsecond. A flusher thread wakes
+    every ``flush_interval`` seconds, or once any buffer holds
+    ``flush_threshold`` events, and writes everything buffered with a single
+    append. Buffers are never truncated, so a burst slows nothing down and
+    loses nothing; it just makes the next batch bigger.
+    """
+
+    def __init__(self, path, flush_interval=0.5, flush_threshold=1024):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._local = threading.local()
+        self._buffers = []
+        self._buffers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="ThreadActivityFlusher", daemon=True)
+        self._flusher.start()
+
+    def _buffer(self):
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = deque()
+            with self._buffers_lock:
+                self._buffers.append((threading.current_thread(), buffer))
+            return buffer
+
+    def record(self, thread_name, status):
+        """Queue a status event ("Running" or "Completed") for ``thread_name``."""
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._buffer()
+        buffer.append((time.time(), thread_name, status))
+        if len(buffer) >= self.flush_threshold:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every buffered event to the log; returns how many were written."""
+        with self._write_lock:
+            with self._buffers_lock:
+                buffers = list(self._buffers)
+                # Forget threads that have finished and been drained
+                self._buffers = [(thread, buffer) for thread, buffer in buffers if thread.is_alive() or buffer]
+            events = []
+            for _, buffer in buffers:
+                # popleft is atomic, so the owning thread can keep appending
+                for _ in range(len(buffer)):
+                    events.append(buffer.popleft())
+            if not events:
+                return 0
+            events.sort(key=lambda event: event[0])
+            lines = "".join(
+                json.dumps({"time": datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT),
+                            "thread": thread_name, "status": status}) + "\n"
+                for timestamp, thread_name, status in events
+            )
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(lines)
+            return len(events)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and write out anything still buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        self.flush()
+
+    def summary(self):
+        """Return {thread: {name, status, start_time, end_time}} for each thread's latest run."""
+        self.flush()
+        try:
+            events = load_json_lines(self.path)
+        except FileNotFoundError:
+            return {}
+        threads = {}
+        for event in events:
+            if event["status"] == "Running":
+                threads[event["thread"]] = {
+                    "name": event["thread"],
+                    "status": "Running",
+                    "start_time": event["time"],
+                    "end_time": None,
+                }
+            elif event["thread"] in threads:
+                threads[event["thread"]].update(status=event["status"], end_time=event["time"])
+        return threads
+
+# One log per file for the whole process. Streamlit re-executes its page
+# script on every rerun, but imported modules (and so this registry) persist.
+_logs = {}
+_logs_lock = threading.Lock()
+
+def get_activity_log(path):
+    """Return the process-wide ThreadActivityLog for ``path``, starting it on first use."""
+    path = os.path.abspath(path)
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = ThreadActivityLog(path)
+            atexit.register(log.close)
+        return log